@@ -8,6 +8,8 @@ Command-line Usage:
   arcgzip.py -a archive.gz targets - Add target files to the archive.
   arcgzip.py -c archive.gz targets - Create a new archive from target files.
   arcgzip.py -d archive.gz targets - Extract files from the archive,
+  arcgzip.py -g archive.gz pattern [members]
+                                   - Search the contents of members.
 
 Create/Append Options:
 
@@ -18,6 +20,29 @@ Create/Append Options:
   --encoding <S> - Specify the encoding of the string (with --content)
   --exfield <B>  - Set the base64-encoded data to the extra field.
   --level <N>    - Compression level to be used (1-fastest/9-slowest)
+  --target-mbps <N>
+                 - Adjust the level to keep compression at N MB/s or above
+                   (not with --pipeline).
+  --solid        - Pack the target files into solid members.
+  --pipeline     - Overlap file I/O and (de)compression (also with -d).
+
+Common Options:
+
+  --bufsize <N>  - Size of the I/O buffer in bytes (default: by file size).
+
+Read Options:
+
+  --recover      - Skip damaged members instead of aborting (-l/-d/-g).
+  --follow       - Keep listing new members as they are appended (-l).
+
+  The archive may also be a http(s) URL, read with range requests.
+  Opening it still reads the whole archive once to list the members;
+  extracting a member then fetches only the ranges it needs.
+
+Search Options:
+
+  --files-with-matches - Only print the names of matching members.
+  --workers <N>        - Number of members to search in parallel.
 """
 
 from __future__ import print_function
@@ -28,6 +53,22 @@ import io
 import time
 import os
 import sys
+import re
+import json
+import threading
+
+from bisect import bisect_right
+from collections import OrderedDict
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue # python2.x compatibility
+
+try:
+    from urllib.request import urlopen, Request
+except ImportError:
+    from urllib2 import urlopen, Request # python2.x compatibility
 
 #--------------------
 # gzip constants
@@ -58,6 +99,56 @@ Z_BEST_COMPRESSION = 9  # between 1 (fastest) and 9 (slowest).
 
 BUFSIZE = 1024 * 16
 
+# Upper limit of the I/O buffer chosen automatically from the file size.
+MAX_BUFSIZE = 1024 * 1024
+
+# Used to resynchronize past damaged members. A member is looked up by
+# the magic bytes followed by the DEFLATE method byte, and accepted if
+# its header parses and the first PROBE_SIZE bytes of data inflate.
+SCAN_BUFSIZE = 1024 * 1024
+PROBE_SIZE = 1024 * 64
+MEMBER_MAGIC = GZIP_MAGIC + b'\x08'
+
+# adddata_many() coalesces the members into writes of this size.
+BATCH_BUFSIZE = 1024 * 256
+
+# A line longer than this many buffers is searched in pieces, so that
+# members without newlines (e.g. binary data) are scanned in linear time.
+GREP_MAXLINE = 16
+
+# An empty final block with fixed Huffman codes. Appended to a full
+# flushed deflate stream, it terminates the stream.
+DEFLATE_END = b'\x03\x00'
+
+# With compresslevel='auto', the level is adjusted to keep the deflate
+# throughput at or above the target. The speed is sampled every
+# AUTO_SAMPLE bytes, and a large member is compressed in AUTO_BLOCKSIZE
+# blocks so that the level can also change within the member. A level
+# not measured yet is tried only with AUTO_HEADROOM times the target.
+AUTO_TARGET_MBPS = 50
+AUTO_BLOCKSIZE = 1024 * 1024
+AUTO_SAMPLE = 1024 * 256
+AUTO_HEADROOM = 1.5
+
+# Chunk size and queue depth of the pipelined add()/extractfile(). Larger
+# chunks than BUFSIZE keep the thread hand-off cost small.
+PIPELINE_BUFSIZE = 1024 * 256
+PIPELINE_DEPTH = 4
+
+# Solid members pack many small files into a single member. The table
+# of contents is stored in a subfield of the extra field [RFC-1952 2.3.1.1]
+# as a sequence of (MTIME, OFFSET, LENGTH, CRC32, NAMELEN) + FNAME.
+SOLID_SUBFIELD = b'SL'
+SOLID_ENTRY_FORMAT = '<4IH'
+SOLID_ENTRY_SIZE = 18
+SOLID_MAXTOC = 0xffff - 4
+SOLID_MAXSIZE = 1024 * 1024 * 4
+
+# Defaults for the block cache in front of a storage backend.
+CACHE_BLOCKSIZE = 1024 * 256
+CACHE_MAXBLOCKS = 64
+CACHE_READAHEAD = 4
+
 TEMPLATE_FULL = """\
 ---
 method:   {CM}
@@ -88,6 +179,12 @@ class BadMagicNumber(GzipError):
 class BadChecksum(GzipError):
     """ Exception for bad checksum"""
 
+class TruncatedMember(GzipError):
+    """ Exception for a member cut off by the end of file """
+
+class BadCompressedData(GzipError):
+    """ Exception for an invalid deflate stream """
+
 #--------------------
 # Utility functions
 #--------------------
@@ -105,6 +202,347 @@ def _read_to_zero(fp):
 
     return res
 
+def _default_bufsize(fileobj):
+    """Choose the size of the I/O buffer from the size and the kind of
+       the storage of <fileobj>.
+    """
+    if isinstance(fileobj, BackendFile):
+        # Remote reads are served from the cache blocks.
+        return getattr(fileobj.backend, 'blocksize', MAX_BUFSIZE)
+
+    try:
+        stat = os.fstat(fileobj.fileno())
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        return BUFSIZE
+
+    bufsize = max(BUFSIZE, getattr(stat, 'st_blksize', 0))
+    while bufsize < MAX_BUFSIZE and bufsize * 64 < stat.st_size:
+        bufsize *= 2
+
+    return bufsize
+
+def _path_of(fileobj):
+    """Return the path of the regular file opened as <fileobj>, or None"""
+    name = getattr(fileobj, 'name', None)
+    if isinstance(name, (bytes, type(u''))) and os.path.isfile(name):
+        return name
+    return None
+
+def _readinto(fp, view):
+    """Read into the memoryview <view>. Return the number of bytes read"""
+    readinto = getattr(fp, 'readinto', None)
+    if readinto is not None:
+        return readinto(view) or 0
+
+    data = fp.read(len(view))
+    view[:len(data)] = data
+    return len(data)
+
+def _inflate(fp, offset, bufsize=BUFSIZE, buf=None):
+    """Yield the decompressed chunks of the deflate stream starting
+       at <offset>. The stream is read into a buffer of <bufsize> bytes
+       reused across reads, so that the whole member never has to be
+       held in memory. <buf> is an optional bytearray to be used as the
+       buffer. A chunk is at most max(bufsize, BUFSIZE) bytes long,
+       however well the data compresses.
+    """
+    fp.seek(offset)
+
+    # We must set windowbits < 0 to get the data
+    # (de-)compressed in raw deflate format.
+    # [zlib 1.2.8 Manual: VIII. Advanced Functions]
+    decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+
+    # The first read is kept small, since most members in an archive
+    # of small files fit in it.
+    if buf is None or len(buf) < bufsize:
+        buf = bytearray(bufsize)
+    view = memoryview(buf)[:bufsize]
+    size = min(BUFSIZE, bufsize)
+    limit = max(bufsize, BUFSIZE)
+
+    while True:
+        n = _readinto(fp, view[:size])
+        if not n:
+            raise TruncatedMember('compressed data truncated')
+        size = bufsize
+
+        src = view[:n]
+        while src:
+            try:
+                data = decoder.decompress(src, limit)
+            except zlib.error as e:
+                raise BadCompressedData(str(e))
+            if data:
+                yield data
+            # At the end of the stream, the bytes after it are left in
+            # both unused_data and unconsumed_tail.
+            if decoder.unused_data:
+                break
+            src = decoder.unconsumed_tail
+
+        if decoder.unused_data != b'':
+            break
+
+    data = decoder.flush()
+    if data:
+        yield data
+
+def _iter_content(fp, gzipinfo, bufsize=BUFSIZE, buf=None):
+    """Yield the decompressed chunks of a member. For a file packed in
+       a solid member, inflate only up to the end of the file.
+    """
+    chunks = _inflate(fp, gzipinfo._data_offset, bufsize, buf)
+
+    if gzipinfo._solid is None:
+        for chunk in chunks:
+            yield chunk
+        return
+
+    start, length = gzipinfo._solid
+    end, pos = start + length, 0
+
+    for chunk in chunks:
+        if pos + len(chunk) > start:
+            piece = chunk[max(start - pos, 0):end - pos]
+            if piece:
+                yield piece
+        pos += len(chunk)
+        if pos >= end:
+            break
+
+    chunks.close()
+
+def _pack_toc(entries):
+    """Build the extra field of a solid member from the list of
+       (filename, mtime, offset, length, crc32) tuples.
+    """
+    toc = []
+    for filename, mtime, offset, length, crc32 in entries:
+        name = filename.encode(FIELD_ENCODING)
+        toc.append(struct.pack(SOLID_ENTRY_FORMAT, mtime, offset, length, crc32, len(name)))
+        toc.append(name)
+
+    toc = b''.join(toc)
+    return SOLID_SUBFIELD + struct.pack('<H', len(toc)) + toc
+
+def _toc_size(filename):
+    return SOLID_ENTRY_SIZE + len(filename.encode(FIELD_ENCODING))
+
+def _unpack_solid(gzipinfo):
+    """Return the list of files packed in the member. If the member is
+       not a solid one, return [gzipinfo].
+    """
+    exfield = gzipinfo.EXFIELD or b''
+
+    toc, pos = None, 0
+    while pos + 4 <= len(exfield):
+        length = struct.unpack('<H', exfield[pos+2:pos+4])[0]
+        if exfield[pos:pos+2] == SOLID_SUBFIELD:
+            toc = exfield[pos+4:pos+4+length]
+            break
+        pos += 4 + length
+
+    if toc is None:
+        return [gzipinfo]
+
+    infos, pos = [], 0
+    while pos < len(toc):
+        mtime, offset, length, crc32, namelen = \
+            struct.unpack(SOLID_ENTRY_FORMAT, toc[pos:pos+SOLID_ENTRY_SIZE])
+        pos += SOLID_ENTRY_SIZE
+
+        info = GzipInfo(FLG=FNAME, MTIME=mtime, XFL=gzipinfo.XFL, OS=gzipinfo.OS,
+                        FNAME=toc[pos:pos+namelen].decode(FIELD_ENCODING))
+        info.CRC32, info.ISIZE = crc32, length
+        info._data_offset = gzipinfo._data_offset
+        info._solid = (offset, length)
+        infos.append(info)
+
+        pos += namelen
+
+    return infos
+
+def _grep(fp, gzipinfo, pattern, firstonly=False, stop=None, bufsize=BUFSIZE):
+    """Search the content of a member line by line. Yield a tuple
+       (gzipinfo, offset, line) for each matching line.
+    """
+    offset, pending, pendsize = 0, [], 0
+    maxline = GREP_MAXLINE * max(bufsize, BUFSIZE)
+    chunks = _iter_content(fp, gzipinfo, bufsize)
+
+    while True:
+        chunk = next(chunks, None)
+        if stop is not None and stop.is_set():
+            return
+
+        if chunk is None:
+            # The last line may lack the terminating newline.
+            block, pending = b''.join(pending), []
+        else:
+            # Only complete lines are scanned, so that the matches
+            # which cross the chunk boundaries are not missed. The
+            # pieces of an unfinished line are joined once it ends.
+            end = chunk.rfind(b'\n') + 1
+            if not end:
+                pending.append(chunk)
+                pendsize += len(chunk)
+                if pendsize <= maxline:
+                    continue
+                # An overlong line is scanned as it is; a match across
+                # the cut may be missed.
+                block, pending = b''.join(pending), []
+            else:
+                pending.append(chunk[:end])
+                block, pending = b''.join(pending), [chunk[end:]]
+            pendsize = len(pending[0]) if pending else 0
+
+        pos = 0
+        while pos < len(block):
+            match = pattern.search(block, pos)
+            if not match:
+                break
+
+            start = block.rfind(b'\n', 0, match.start()) + 1
+            lineend = block.find(b'\n', match.start())
+            if lineend < 0:
+                lineend = len(block)
+
+            yield (gzipinfo, offset + start, block[start:lineend])
+
+            if firstonly:
+                return
+            pos = lineend + 1
+
+        if chunk is None:
+            return
+        offset += len(block)
+
+def _put(q, item, stop):
+    """Put <item> to the bounded queue unless <stop> is set"""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            pass
+
+def _pipeline(read, transform, write, depth=PIPELINE_DEPTH):
+    """Run read(), transform() and write() as overlapped stages.
+
+       read() runs in a reader thread and returns b'' at the end of
+       input. transform() runs in the calling thread and returns the
+       bytes to write, or None to stop early. write() runs in a writer
+       thread. The stages are connected by queues bounded to <depth>
+       chunks. Exceptions in any stage are re-raised in the caller.
+    """
+    inq, outq = queue.Queue(depth), queue.Queue(depth)
+    stop = threading.Event()
+    errors = []
+
+    def reader():
+        try:
+            while not stop.is_set():
+                chunk = read()
+                _put(inq, chunk, stop)
+                if not chunk:
+                    break
+        except Exception as e:
+            errors.append(e)
+            _put(inq, b'', stop)
+
+    def writer():
+        while True:
+            chunk = outq.get()
+            if chunk is None:
+                break
+            if errors:
+                continue # Drain the queue to unblock the caller
+            try:
+                write(chunk)
+            except Exception as e:
+                errors.append(e)
+                stop.set()
+
+    threads = [threading.Thread(target=reader), threading.Thread(target=writer)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    try:
+        while not stop.is_set():
+            try:
+                chunk = inq.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if not chunk:
+                break
+
+            data = transform(chunk)
+            if data is None:
+                break
+            if data:
+                outq.put(data)
+    finally:
+        stop.set()
+        outq.put(None)
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
+
+def _compress_pipelined(src, dst, encoder):
+    """Compress <src> into <dst> with overlapped I/O. Return the
+       CRC32 and the size of the input.
+    """
+    state = [0, 0]
+
+    def compress(data):
+        # CRC32 is computed alongside the compression.
+        state[0] = zlib.crc32(data, state[0])
+        state[1] = (state[1] + len(data)) % 0x100000000
+        return encoder.compress(data)
+
+    _pipeline(lambda: src.read(PIPELINE_BUFSIZE), compress, dst.write)
+
+    return state[0] & 0xffffffff, state[1]
+
+def _extract_pipelined(src, gzipinfo, dst):
+    """Decompress a member into <dst> with overlapped I/O, and verify
+       the CRC32 and the size of the output.
+    """
+    src.seek(gzipinfo._data_offset)
+    decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+    state = [0, 0, False]
+
+    def decompress(buf):
+        if state[2]:
+            return None
+
+        try:
+            data = decoder.decompress(buf)
+        except zlib.error as e:
+            raise BadCompressedData(str(e))
+        if decoder.unused_data != b'':
+            data += decoder.flush()
+            state[2] = True
+
+        state[0] = zlib.crc32(data, state[0])
+        state[1] = (state[1] + len(data)) % 0x100000000
+        return data
+
+    _pipeline(lambda: src.read(PIPELINE_BUFSIZE), decompress, dst.write)
+
+    if not state[2]:
+        raise TruncatedMember('compressed data truncated')
+
+    crc32 = state[0] & 0xffffffff
+    if crc32 != gzipinfo.CRC32:
+        raise BadChecksum('invalid CRC32 checksum: {} != {}'.format(crc32, gzipinfo.CRC32))
+    elif state[1] != gzipinfo.ISIZE:
+        raise BadChecksum('incorrect file length: {} != {}'.format(state[1], gzipinfo.ISIZE))
+
 #--------------------
 # GzipInfo class
 #--------------------
@@ -127,13 +565,89 @@ class GzipInfo:
         # This property is meant to be used only internally.
         self._data_offset = None
 
+        # The (offset, length) of the file in the decompressed data,
+        # if the file is packed in a solid member.
+        self._solid = None
+
+        # True if CRC32 and ISIZE have been checked against the data.
+        self._verified = False
+
     def __repr__(self):
         return '<GzipInfo FLG={}, MTIME={}, XFL={}, OS={}, EXFIELD={}, FNAME={}, FCOMMENT={}>'.format(
                     self.FLG, self.MTIME, self.XFL, self.OS, self.EXFIELD, self.FNAME, self.FCOMMENT)
 
     @classmethod
-    def fromgzipfile(cls, gzipfile):
-        """Read a member from gzipfile. Return GzipInfo object"""
+    def fromgzipfile(cls, gzipfile, buf=None):
+        """Read a member from gzipfile. Return GzipInfo object
+
+           <buf> is an optional bytearray used as the read buffer, so
+           that it can be reused across members.
+        """
+        obj = cls.fromheader(gzipfile)
+
+        # Skip the body part
+        decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+
+        if buf is None:
+            buf = bytearray(BUFSIZE)
+        view = memoryview(buf)
+
+        # Start with a small read, since most members in an archive of
+        # small files fit in it. A larger member uses the whole buffer.
+        size = min(BUFSIZE, len(buf))
+        limit = max(len(buf), BUFSIZE)
+
+        crc32, isize = 0, 0
+        while True:
+            n = _readinto(gzipfile, view[:size])
+            if not n:
+                raise TruncatedMember('compressed data truncated')
+            size = len(buf)
+
+            # The output of a read is inflated in chunks of <limit> bytes
+            # at most, however well the data compresses.
+            src = view[:n]
+            while src:
+                try:
+                    data = decoder.decompress(src, limit)
+                except zlib.error as e:
+                    raise BadCompressedData(str(e))
+
+                crc32 = zlib.crc32(data, crc32)
+                isize = (isize + len(data)) % 0x100000000
+
+                if decoder.unused_data:
+                    break
+                src = decoder.unconsumed_tail
+
+            if decoder.unused_data != b'':
+                gzipfile.seek(-len(decoder.unused_data), 1)
+                break
+
+        data = decoder.flush()
+        crc32 = zlib.crc32(data, crc32) & 0xffffffff
+        isize = (isize + len(data)) % 0x100000000
+
+        # Read the footer
+        buf = gzipfile.read(FOOTER_SIZE)
+        if len(buf) < FOOTER_SIZE:
+            raise TruncatedMember('file footer truncated')
+
+        obj.CRC32, obj.ISIZE = struct.unpack(FOOTER_FORMAT, buf)
+
+        if crc32 != obj.CRC32:
+            raise BadChecksum('invalid CRC32 checksum: {} != {}'.format(crc32, obj.CRC32))
+        elif isize != obj.ISIZE:
+            raise BadChecksum('incorrect file length: {} != {}'.format(isize, obj.ISIZE))
+
+        obj._verified = True
+        return obj
+
+    @classmethod
+    def fromheader(cls, gzipfile):
+        """Read a member header from gzipfile, leaving the file pointer
+           at the start of the compressed data. Return GzipInfo object
+        """
         obj = cls()
 
         # Read the header
@@ -146,7 +660,7 @@ class GzipInfo:
             raise BadMagicNumber('magic header is not present')
 
         if len(buf) < HEADER_SIZE:
-            raise GzipError('file header truncated')
+            raise TruncatedMember('file header truncated')
 
         unpack = struct.unpack(HEADER_FORMAT, buf)
 
@@ -162,57 +676,42 @@ class GzipInfo:
         exbuf = b''
         if obj.FLG & FEXTRA:
             XLEN = gzipfile.read(2)
-            obj.EXFIELD = gzipfile.read(struct.unpack('<H', XLEN)[0])
+            if len(XLEN) < 2:
+                raise TruncatedMember('could not read the extra field')
+
+            xlen = struct.unpack('<H', XLEN)[0]
+            obj.EXFIELD = gzipfile.read(xlen)
+            if len(obj.EXFIELD) < xlen:
+                raise TruncatedMember('could not read the extra field')
 
             exbuf += (XLEN + obj.EXFIELD)
 
         if obj.FLG & FNAME:
             bs = _read_to_zero(gzipfile)
             if bs is None:
-                raise GzipError('could not read the name of file')
+                raise TruncatedMember('could not read the name of file')
             exbuf += bs + b'\0'
             obj.FNAME = bs.decode(FIELD_ENCODING)
 
         if obj.FLG & FCOMMENT:
             bs = _read_to_zero(gzipfile)
             if bs is None:
-                raise GzipError('could not read the file comment')
+                raise TruncatedMember('could not read the file comment')
             exbuf += bs + b'\0'
             obj.FCOMMENT = bs.decode(FIELD_ENCODING)
 
         if obj.FLG & FHCRC:
-            obj.CRC16 = struct.unpack('<H', gzipfile.read(2))[0]
+            buf16 = gzipfile.read(2)
+            if len(buf16) < 2:
+                raise TruncatedMember('could not read the CRC16 checksum')
+
+            obj.CRC16 = struct.unpack('<H', buf16)[0]
 
             crc16 = (zlib.crc32(buf+exbuf) & 0xffffffff) % 0x10000
             if crc16 != obj.CRC16:
                 raise BadChecksum('invalid CRC16 checksum: {} != {}'.format(crc16, obj.CRC16))
 
-        # Skip the body part
         obj._data_offset = gzipfile.tell()
-        decoder = zlib.decompressobj(-zlib.MAX_WBITS)
-
-        crc32, isize = 0, 0
-        while True:
-            data = decoder.decompress(gzipfile.read(BUFSIZE))
-
-            crc32 = zlib.crc32(data, crc32)
-            isize = (isize + len(data)) % 0x100000000
-
-            if decoder.unused_data != b'':
-                gzipfile.seek(-len(decoder.unused_data), 1)
-                break
-
-        data = decoder.flush()
-        crc32 = zlib.crc32(data, crc32) & 0xffffffff
-        isize = (isize + len(data)) % 0x100000000
-
-        # Read the footer
-        obj.CRC32, obj.ISIZE = struct.unpack(FOOTER_FORMAT, gzipfile.read(FOOTER_SIZE))
-
-        if crc32 != obj.CRC32:
-            raise BadChecksum('invalid CRC32 checksum: {} != {}'.format(crc32, obj.CRC32))
-        elif isize != obj.ISIZE:
-            raise BadChecksum('incorrect file length: {} != {}'.format(isize, obj.ISIZE))
 
         return obj
 
@@ -318,23 +817,524 @@ class GzipInfo:
 
         return res
 
+#--------------------
+# Storage backends
+#--------------------
+class StorageBackend:
+    """Interface of a read-only storage that supports range reads."""
+
+    def read_at(self, offset, size):
+        """Return at most <size> bytes starting from <offset>"""
+        raise NotImplementedError
+
+    def size(self):
+        """Return the total size of the storage in bytes"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class LocalFileBackend(StorageBackend):
+    """Range reads from a local file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._fp = open(path, 'rb')
+        self._lock = threading.Lock()
+
+    def read_at(self, offset, size):
+        with self._lock:
+            self._fp.seek(offset)
+            return self._fp.read(size)
+
+    def size(self):
+        return os.fstat(self._fp.fileno()).st_size
+
+    def close(self):
+        self._fp.close()
+
+class HTTPRangeBackend(StorageBackend):
+    """Range reads from a HTTP(S) server using 'Range' requests"""
+
+    def __init__(self, url, timeout=60):
+        self.url = url
+        self.timeout = timeout
+        self._size = None
+
+    def read_at(self, offset, size):
+        if size <= 0 or offset >= self.size():
+            return b''
+
+        end = min(offset + size, self.size()) - 1
+        request = Request(self.url, headers={'Range': 'bytes={}-{}'.format(offset, end)})
+
+        resp = urlopen(request, timeout=self.timeout)
+        try:
+            if resp.getcode() != 206:
+                raise IOError('server does not support range requests: {}'.format(self.url))
+            return resp.read()
+        finally:
+            resp.close()
+
+    def size(self):
+        if self._size is None:
+            request = Request(self.url)
+            request.get_method = lambda: 'HEAD'
+
+            resp = urlopen(request, timeout=self.timeout)
+            try:
+                length = resp.info().get('Content-Length')
+            finally:
+                resp.close()
+
+            if length is None:
+                # Chunked responses lack the length. The total size is
+                # also given by the Content-Range of a range response.
+                length = self._range_total()
+            self._size = int(length)
+
+        return self._size
+
+    def _range_total(self):
+        """Return the total size in the Content-Range of a 1-byte read"""
+        request = Request(self.url, headers={'Range': 'bytes=0-0'})
+
+        resp = urlopen(request, timeout=self.timeout)
+        try:
+            content_range = resp.info().get('Content-Range') or ''
+        finally:
+            resp.close()
+
+        total = content_range.rpartition('/')[2]
+        if not total.isdigit():
+            raise IOError('could not determine the size of {}'.format(self.url))
+
+        return total
+
+class BlockCache(StorageBackend):
+    """Cache fixed-size blocks of a backend with LRU eviction.
+
+       When blocks are read in sequence, the following <readahead>
+       blocks are fetched together with the missing one, so that a
+       sequential scan issues few large range reads while a random
+       access (e.g. a single extract) only fetches what it needs.
+    """
+
+    def __init__(self, backend, blocksize=CACHE_BLOCKSIZE, maxblocks=CACHE_MAXBLOCKS,
+                 readahead=CACHE_READAHEAD):
+        if maxblocks < 1:
+            raise ValueError('maxblocks must be 1 or more')
+
+        self.backend = backend
+        self.blocksize = blocksize
+        self.maxblocks = maxblocks
+        self.readahead = readahead
+
+        # Statistics of the backend access
+        self.requests = 0
+        self.fetched = 0
+
+        self._blocks = OrderedDict()
+        self._last = None
+        self._lock = threading.Lock()
+
+    def _fetch(self, index):
+        """Fetch the block <index> (and the read-ahead blocks)"""
+        count = 1
+        if self._last is not None and index == self._last + 1:
+            # Never read ahead more than fits in the cache, or the
+            # block itself would be evicted.
+            count = min(count + self.readahead, self.maxblocks)
+
+        # Do not fetch the blocks already cached again.
+        while count > 1 and index + count - 1 in self._blocks:
+            count -= 1
+
+        data = self.backend.read_at(index * self.blocksize, count * self.blocksize)
+        self.requests += 1
+        self.fetched += len(data)
+
+        for i in range(count):
+            block = data[i*self.blocksize:(i+1)*self.blocksize]
+            if not block:
+                break
+            self._blocks[index + i] = block
+
+        while len(self._blocks) > self.maxblocks:
+            self._blocks.popitem(last=False)
+
+    def _block(self, index):
+        if index not in self._blocks:
+            self._fetch(index)
+
+        self._last = index
+        block = self._blocks.pop(index, b'')
+        if block:
+            self._blocks[index] = block # Mark as recently used
+
+        return block
+
+    def read_at(self, offset, size):
+        res = []
+
+        with self._lock:
+            while size > 0:
+                index, start = divmod(offset, self.blocksize)
+                block = self._block(index)[start:start+size]
+                if not block:
+                    break
+
+                res.append(block)
+                offset += len(block)
+                size -= len(block)
+
+        return b''.join(res)
+
+    def size(self):
+        return self.backend.size()
+
+    def close(self):
+        self._blocks.clear()
+        self.backend.close()
+
+class BackendFile(io.RawIOBase):
+    """Read-only, seekable file object over a storage backend"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self._pos
+        elif whence == 2:
+            offset += self.backend.size()
+
+        if offset < 0:
+            raise ValueError('negative seek position {}'.format(offset))
+
+        self._pos = offset
+        return self._pos
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = max(self.backend.size() - self._pos, 0)
+
+        data = self.backend.read_at(self._pos, size)
+        self._pos += len(data)
+
+        return data
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self.backend.close()
+        io.RawIOBase.close(self)
+
+#--------------------
+# AutoLevel class
+#--------------------
+_timer = getattr(time, 'perf_counter', time.time)
+
+def _compressobj(compresslevel, zdict=None):
+    """Create a raw deflate compressor, primed with <zdict> if given"""
+    if zdict:
+        try:
+            return zlib.compressobj(compresslevel, zlib.DEFLATED, -zlib.MAX_WBITS,
+                                    zlib.DEF_MEM_LEVEL, zlib.Z_DEFAULT_STRATEGY, zdict)
+        except TypeError:
+            pass # zdict is not supported before python 3.3.
+
+    return zlib.compressobj(compresslevel, zlib.DEFLATED, -zlib.MAX_WBITS)
+
+class AutoLevel:
+    """Choose the compression level on the fly, so that the deflate
+       throughput stays at or above <target_mbps> (MB/s of input) with
+       the best ratio possible.
+
+       Pass it as <compresslevel> to GzipFile.add() and the like. The
+       levels used for each member are recorded in <stats>.
+    """
+
+    def __init__(self, target_mbps=AUTO_TARGET_MBPS, level=6):
+        self.target_mbps = target_mbps
+        self.level = level
+        self.stats = []
+
+        self._speeds = {}   # Measured MB/s of each level
+        self._nbytes = 0
+        self._seconds = 0.0
+
+        # The levels used and the time spent on the current member
+        self._levels = []
+        self._elapsed = 0.0
+
+    def _update(self, nbytes, seconds):
+        """Account the compression of <nbytes> in <seconds>, and adjust
+           the level once enough bytes have been sampled.
+        """
+        self._nbytes += nbytes
+        self._seconds += seconds
+        self._elapsed += seconds
+
+        if self._nbytes < AUTO_SAMPLE:
+            return
+
+        speed = self._nbytes / max(self._seconds, 1e-9) / 1e6
+        self._nbytes, self._seconds = 0, 0.0
+
+        # Moving average, since the speed also depends on the data.
+        if self.level in self._speeds:
+            speed = (self._speeds[self.level] + speed) / 2
+        self._speeds[self.level] = speed
+
+        if speed < self.target_mbps:
+            faster = [level for level, s in self._speeds.items()
+                      if level < self.level and s >= self.target_mbps]
+            self.level = max(faster) if faster else max(self.level - 1, Z_BEST_SPEED)
+
+        elif self.level < Z_BEST_COMPRESSION:
+            slower = self._speeds.get(self.level + 1)
+            if (slower is None and speed >= self.target_mbps * AUTO_HEADROOM) or \
+               (slower is not None and slower >= self.target_mbps):
+                self.level += 1
+
+    def compress(self, src, dst, encoder):
+        """Compress <src> into <dst> block by block, switching the level
+           between blocks. Return the CRC32, the size of the input and
+           the last compressor (to be flushed by the caller).
+        """
+        crc32, isize = 0, 0
+        self._levels = [self.level]
+        self._elapsed = 0.0
+
+        while True:
+            data = src.read(AUTO_BLOCKSIZE)
+            if data == b'':
+                break
+            crc32 = zlib.crc32(data, crc32)
+            isize = (isize + len(data)) % 0x100000000
+
+            start = _timer()
+            buf = encoder.compress(data)
+            level = self.level
+            self._update(len(data), _timer() - start)
+
+            if self.level != level:
+                # A sync flush ends the deflate blocks on a byte boundary,
+                # so a new compressor can carry on the same stream. It is
+                # primed with the last 32 KiB to keep the ratio.
+                buf += encoder.flush(zlib.Z_SYNC_FLUSH)
+                encoder = _compressobj(self.level, zdict=data[-32768:])
+                self._levels.append(self.level)
+
+            dst.write(buf)
+
+        return crc32 & 0xffffffff, isize, encoder
+
+    def record(self, gzipinfo, csize):
+        """Record the statistics of the member just compressed"""
+        self.stats.append({
+            'filename': gzipinfo.FNAME,
+            'levels': self._levels,
+            'isize': gzipinfo.ISIZE,
+            'csize': csize,
+            'mbps': gzipinfo.ISIZE / max(self._elapsed, 1e-9) / 1e6
+        })
+
+#--------------------
+# MemberStream class
+#--------------------
+class MemberStream(io.RawIOBase):
+    """Read-only, seekable raw stream over the decompressed contents of
+       members, as if they were concatenated (like 'gunzip -c').
+
+       The stream is built from the ISIZE of each member. Since ISIZE is
+       the size modulo 2^32, members larger than 4 GiB are not supported.
+    """
+
+    def __init__(self, segments, bufsize=BUFSIZE):
+        # <segments> is a list of (fileobj, data_offset, skip, length),
+        # meaning <length> bytes after <skip> bytes of the member data.
+        self._segments = segments
+        self._buffer = memoryview(bytearray(bufsize))
+        self._limit = max(bufsize, BUFSIZE) # The maximum size of a chunk
+        self._starts = []
+        self._size = 0
+
+        for fileobj, data_offset, skip, length in segments:
+            self._starts.append(self._size)
+            self._size += length
+
+        self._pos = 0
+
+        # State of the member being inflated
+        self._index = None
+        self._decoder = None
+        self._cpos = 0      # Position in the compressed data
+        self._chunk = b''   # The last chunk inflated
+        self._chunkpos = 0  # Position of _chunk in the member data
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self._pos
+        elif whence == 2:
+            offset += self._size
+
+        if offset < 0:
+            raise ValueError('negative seek position {}'.format(offset))
+
+        self._pos = offset
+        return self._pos
+
+    def _restart(self, index):
+        fileobj, data_offset, skip, length = self._segments[index]
+
+        self._index = index
+        self._decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+        self._cpos = data_offset
+        self._chunk, self._chunkpos = b'', 0
+
+    def _inflate(self):
+        """Inflate the next chunk of the current member"""
+        fileobj = self._segments[self._index][0]
+
+        # The input left over from the last read is inflated first, so
+        # that a chunk never exceeds self._limit.
+        src = self._decoder.unconsumed_tail
+        if not src or self._decoder.unused_data:
+            # Seek every time, since the file pointer may be shared with
+            # the other methods of GzipFile.
+            fileobj.seek(self._cpos)
+            n = _readinto(fileobj, self._buffer)
+            if not n:
+                raise TruncatedMember('compressed data truncated')
+            self._cpos += n
+            src = self._buffer[:n]
+
+        self._chunkpos += len(self._chunk)
+        try:
+            self._chunk = self._decoder.decompress(src, self._limit)
+        except zlib.error as e:
+            raise BadCompressedData(str(e))
+        if self._decoder.unused_data != b'':
+            self._chunk += self._decoder.flush()
+
+    def _view(self):
+        """Return the bytes at the current position as a memoryview"""
+        index = bisect_right(self._starts, self._pos) - 1
+        fileobj, data_offset, skip, length = self._segments[index]
+        target = skip + self._pos - self._starts[index]
+
+        # Seeking backward requires to inflate the member from the start.
+        if index != self._index or target < self._chunkpos:
+            self._restart(index)
+
+        while self._chunkpos + len(self._chunk) <= target:
+            self._inflate()
+
+        return memoryview(self._chunk)[target - self._chunkpos:]
+
+    def readinto(self, b):
+        view = memoryview(b)
+        n = 0
+
+        while n < len(view) and self._pos < self._size:
+            # Do not read beyond the end of the segment.
+            index = bisect_right(self._starts, self._pos) - 1
+            remain = self._starts[index] + self._segments[index][3] - self._pos
+
+            data = self._view()
+            k = min(len(data), len(view) - n, remain)
+
+            view[n:n+k] = data[:k]
+            n += k
+            self._pos += k
+
+        return n
+
+    def readall(self):
+        res = []
+        while True:
+            buf = bytearray(max(min(self._size - self._pos, BUFSIZE * 64), 0))
+            n = self.readinto(buf)
+            if not n:
+                break
+            res.append(bytes(buf[:n]))
+
+        return b''.join(res)
+
 #--------------------
 # GzipFile class
 #--------------------
 class GzipFile:
-    def __init__(self, fileobj=None, mode='r'):
-        self.fileobj = fileobj
-        self.mode = mode
-        self.closed = False
-        self.gzipinfos = []
+    def __init__(self, fileobj=None, mode='r', recover=False, truncate=False, follow=False,
+                 bufsize=None):
+        self._setup(fileobj, mode, recover, bufsize)
 
         try:
-            if mode == 'r':
+            if mode == 'r' and follow:
+                self.refresh()
+            elif mode == 'r':
                 self._load()
+            elif mode == 'a+':
+                self._load_tail(truncate)
         except:
             fileobj.close()
             raise
 
+    def _setup(self, fileobj, mode, recover, bufsize, bufsource=None):
+        """Initialize the attributes of an archive before loading it.
+           The default buffer size is chosen from <bufsource> (default:
+           <fileobj>).
+        """
+        if bufsize is not None and bufsize < 1:
+            raise ValueError('bufsize must be 1 or more')
+
+        self.fileobj = fileobj
+        self.mode = mode
+        self.recover = recover
+        self.closed = False
+        self.gzipinfos = []
+
+        # The byte ranges (start, end) skipped in recover mode.
+        self.skipped = []
+
+        # The byte offset just past the last complete member.
+        self._end_offset = 0
+
+        # Used with compresslevel='auto'
+        self.autolevel = AutoLevel()
+
+        # The size of the I/O buffer. If not specified, it is chosen from
+        # the size of the file (of the archive or of the file to add).
+        self._autobufsize = bufsize is None
+        self.bufsize = bufsize or _default_bufsize(bufsource or fileobj)
+        self._buffer = bytearray(self.bufsize)
+
     def __enter__(self):
         return self
 
@@ -342,44 +1342,256 @@ class GzipFile:
         self.close()
 
     @classmethod
-    def open(cls, filename, mode='r'):
-        """Open a gzip archive. Return GzipInfo object"""
+    def open(cls, filename, mode='r', recover=False, truncate=False, follow=False,
+             bufsize=None):
+        """Open a gzip archive. Return GzipInfo object
+
+           If <recover> is true, damaged members are skipped instead of
+           raising an error (only in read mode).
+
+           If <follow> is true, the archive is assumed to be growing: an
+           empty file or a partially written member at the end is not
+           an error. Use refresh() or follow() to load new members.
+
+           <bufsize> is the size of the I/O buffer. By default, it is
+           chosen from the file size (up to MAX_BUFSIZE).
+
+           Mode 'a+' appends to the archive like 'a', but also loads the
+           member list so that it can be queried while appending. If the
+           archive does not end on a member boundary (e.g. after a torn
+           write), an error is raised unless <truncate> is true, in which
+           case the damaged tail is cut off. A tail which does not start
+           with a member header, or a damaged member followed by valid
+           ones, is never cut off.
+        """
+
+        if mode not in ('r', 'w', 'a', 'a+'):
+            raise ValueError("mode must be 'r', 'w', 'a' or 'a+'")
+
+        # Checked before the file is opened (and truncated with 'w').
+        if bufsize is not None and bufsize < 1:
+            raise ValueError('bufsize must be 1 or more')
 
-        if mode not in ('r', 'w', 'a'):
-            raise ValueError("mode must be 'r', 'w' or 'a'")
+        if re.match('https?://', filename):
+            if mode != 'r':
+                raise ValueError("remote archives can only be opened with mode 'r'")
+            return cls.openbackend(HTTPRangeBackend(filename), recover=recover,
+                                   bufsize=bufsize)
 
-        fileobj = open(filename, mode+'b')
-        obj = cls(fileobj, mode=mode)
+        fmode = mode + 'b'
+        if mode == 'a+':
+            fmode = 'r+b' if os.path.exists(filename) else 'w+b'
+
+        fileobj = open(filename, fmode)
+        obj = cls(fileobj, mode=mode, recover=recover, truncate=truncate, follow=follow,
+                  bufsize=bufsize)
 
         return obj
 
+    @classmethod
+    def openbackend(cls, backend, recover=False, blocksize=CACHE_BLOCKSIZE,
+                    maxblocks=CACHE_MAXBLOCKS, readahead=CACHE_READAHEAD, bufsize=None):
+        """Open a gzip archive on a storage backend for reading through
+           a block cache. Return GzipFile object
+
+           Building the member list reads the whole archive through the
+           backend once, as with a local file. Later reads of a member
+           fetch only the blocks which contain it.
+        """
+        cache = BlockCache(backend, blocksize=blocksize, maxblocks=maxblocks,
+                           readahead=readahead)
+
+        return cls(BackendFile(cache), mode='r', recover=recover, bufsize=bufsize)
+
     def _load(self):
         """Read through an entire archive to get the list of members"""
         self.gzipinfos = []
+        self.skipped = []
 
         while True:
+            offset = self.fileobj.tell()
             try:
-                info = GzipInfo.fromgzipfile(self.fileobj)
+                info = GzipInfo.fromgzipfile(self.fileobj, self._buffer)
             except EmptyHeader:
                 if self.gzipinfos:
                     break
                 raise IOError('file is empty')
             except BadMagicNumber as e:
+                if self.recover and self._resync(offset):
+                    continue
                 if self.gzipinfos:
                     logging.warning('trailing garbage bytes ignored')
                     break
                 raise IOError('file is not gzip format')
-            self.gzipinfos.append(info)
+            except GzipError as e:
+                if not self.recover:
+                    raise
+                logging.warning('damaged member at offset {}: {}'.format(offset, e))
+                if self._resync(offset):
+                    continue
+                break
+            self.gzipinfos.extend(_unpack_solid(info))
+            self._end_offset = self.fileobj.tell()
+
+        if not self.gzipinfos:
+            raise IOError('no salvageable member found')
+
+    def _load_tail(self, truncate=False):
+        """Read the member list for appending, and check that the archive
+           ends on a clean member boundary.
+        """
+        self.gzipinfos = []
+        self._end_offset = 0
+
+        while True:
+            try:
+                info = GzipInfo.fromgzipfile(self.fileobj, self._buffer)
+            except EmptyHeader:
+                break
+            except GzipError as e:
+                # A torn write leaves a valid prefix followed by garbage,
+                # which fails in any part of the member.
+                if not truncate:
+                    raise GzipError('partial member at offset {}: {}'.format(self._end_offset, e))
+
+                # Never cut off what is not a member (e.g. a text file
+                # opened by mistake); the tail must start with a member
+                # header or be a prefix of one.
+                self.fileobj.seek(self._end_offset)
+                head = self.fileobj.read(len(MEMBER_MAGIC))
+                if not MEMBER_MAGIC.startswith(head):
+                    raise GzipError('no member at offset {}: {}'.format(self._end_offset, e))
+                if self._scan(self._end_offset + 1) is not None:
+                    raise GzipError('damaged member at offset {} is not at the end: {}'.format(self._end_offset, e))
+                logging.warning('truncated the partial member at offset {}'.format(self._end_offset))
+                self.fileobj.truncate(self._end_offset)
+                break
+            self.gzipinfos.extend(_unpack_solid(info))
+            self._end_offset = self.fileobj.tell()
+
+        self.fileobj.seek(self._end_offset)
+
+    def refresh(self):
+        """Load the members appended since the last load, verifying only
+           the new bytes. A partially written member at the end is left
+           for the next call. Return the list of new GzipInfo objects.
+        """
+
+        if self.mode != 'r':
+            raise IOError('file not open for reading')
+
+        new = []
+        while True:
+            self.fileobj.seek(self._end_offset)
+            try:
+                info = GzipInfo.fromgzipfile(self.fileobj, self._buffer)
+            except (EmptyHeader, TruncatedMember):
+                break
+            except BadMagicNumber:
+                # The first byte of the magic may have been written.
+                self.fileobj.seek(self._end_offset)
+                if GZIP_MAGIC.startswith(self.fileobj.read(2)):
+                    break
+                raise GzipError('garbage bytes at offset {}'.format(self._end_offset))
+
+            new.extend(_unpack_solid(info))
+            self._end_offset = self.fileobj.tell()
+
+        self.gzipinfos.extend(new)
+
+        return new
+
+    def follow(self, interval=1.0, timeout=None):
+        """Poll the archive every <interval> seconds, and yield the
+           GzipInfo objects of new members as they appear. Stop if no
+           new member is appended for <timeout> seconds (default: never).
+        """
+        last = time.time()
+
+        while True:
+            new = self.refresh()
+            for info in new:
+                yield info
+
+            if new:
+                last = time.time()
+            elif timeout is not None and time.time() - last >= timeout:
+                return
+            else:
+                time.sleep(interval)
+
+    def _resync(self, offset):
+        """Skip a damaged member at <offset> and move the file pointer
+           to the next valid member. Return False if none is found.
+        """
+        start = self._scan(offset + 1)
+        end = start
+
+        if end is None:
+            self.fileobj.seek(0, 2)
+            end = self.fileobj.tell()
+
+        if self.skipped and self.skipped[-1][1] == offset:
+            offset = self.skipped.pop()[0]
+        self.skipped.append((offset, end))
+
+        logging.warning('skipped bytes {}-{}'.format(offset, end))
+
+        if start is None:
+            return False
+
+        self.fileobj.seek(start)
+        return True
+
+    def _scan(self, offset):
+        """Search forward from <offset> for the start of a valid member.
+           Return its offset or None.
+        """
+        # Large blocks are searched with bytes.find() rather than
+        # reading byte by byte. Consecutive blocks overlap so that
+        # magic bytes on a block boundary are not missed.
+        overlap = len(MEMBER_MAGIC) - 1
+
+        while True:
+            self.fileobj.seek(offset)
+            buf = self.fileobj.read(SCAN_BUFSIZE)
+
+            pos = buf.find(MEMBER_MAGIC)
+            while pos >= 0:
+                if self._probe(offset + pos):
+                    return offset + pos
+                pos = buf.find(MEMBER_MAGIC, pos + 1)
+
+            if len(buf) < SCAN_BUFSIZE:
+                return None
+            offset += len(buf) - overlap
+
+    def _probe(self, offset):
+        """Check if a valid member seems to start at <offset>"""
+        self.fileobj.seek(offset)
+
+        try:
+            GzipInfo.fromheader(self.fileobj)
+            decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+            decoder.decompress(self.fileobj.read(PROBE_SIZE))
+        except (GzipError, zlib.error):
+            return False
+
+        return True
 
     def close(self):
         """Close the file descripter"""
         self.closed = True
         self.fileobj.close()
 
+    def _fileobj_for(self, gzipinfo):
+        """Return the file object which contains the member."""
+        return self.fileobj
+
     def getinfo(self, filename):
         """Search a member by filename. Return GzipInfo object."""
 
-        if self.mode != 'r':
+        if self.mode not in ('r', 'a+'):
             raise IOError('file not open for reading')
 
         gzipinfos = self.getinfolist()
@@ -391,44 +1603,96 @@ class GzipFile:
     def getinfolist(self):
         """Return the list of members in the archive."""
 
-        if self.mode != 'r':
+        if self.mode not in ('r', 'a+'):
             raise IOError('file not open for reading')
 
         return self.gzipinfos
 
+    def _resolve_level(self, compresslevel):
+        """Return the compression level to be used and the AutoLevel
+           object (or None) for <compresslevel>.
+        """
+        if compresslevel == 'auto':
+            compresslevel = self.autolevel
+
+        if isinstance(compresslevel, AutoLevel):
+            return compresslevel.level, compresslevel
+
+        return compresslevel, None
+
     # Methods to add/extract file object. The other gzip-manipulating
     # methods are built on these functions.
-    def add(self, fileobj, gzipinfo=None, compresslevel=6):
-        """Append a file to the end of the archive."""
+    def add(self, fileobj, gzipinfo=None, compresslevel=6, pipeline=False):
+        """Append a file to the end of the archive.
 
-        if self.mode not in ('w', 'a'):
+           If <pipeline> is true, reading, compression and writing run
+           concurrently in separate threads.
+
+           <compresslevel> may be 'auto' (or an AutoLevel object) to
+           adjust the level to the throughput target of self.autolevel
+           (or of the object).
+        """
+
+        if self.mode not in ('w', 'a', 'a+'):
             raise IOError('file not writible')
 
+        compresslevel, autolevel = self._resolve_level(compresslevel)
+        if autolevel and pipeline:
+            raise ValueError("pipeline cannot be used with compresslevel='auto'")
+
         if gzipinfo is None:
             gzipinfo = GzipInfo.fromfileobj(fileobj)
 
+        if self.mode == 'a+':
+            # The file pointer may have been moved by extract().
+            self.fileobj.seek(self._end_offset)
+
         self.fileobj.write(gzipinfo.tobuf())
+        gzipinfo._data_offset = self.fileobj.tell()
 
         crc32, isize = 0, 0
         encoder = zlib.compressobj(compresslevel, zlib.DEFLATED, -zlib.MAX_WBITS)
 
-        while True:
-            data = fileobj.read(BUFSIZE)
-            if data == b'':
-                break
-            crc32 = zlib.crc32(data, crc32)
-            isize = (isize + len(data)) % 0x100000000
-            self.fileobj.write(encoder.compress(data))
+        if autolevel:
+            crc32, isize, encoder = autolevel.compress(fileobj, self.fileobj, encoder)
+        elif pipeline:
+            crc32, isize = _compress_pipelined(fileobj, self.fileobj, encoder)
+        else:
+            bufsize = self.bufsize
+            if self._autobufsize:
+                bufsize = max(bufsize, _default_bufsize(fileobj))
+            if len(self._buffer) < bufsize:
+                self._buffer = bytearray(bufsize)
+            view = memoryview(self._buffer)[:bufsize]
+
+            while True:
+                n = _readinto(fileobj, view)
+                if not n:
+                    break
+                crc32 = zlib.crc32(view[:n], crc32)
+                isize = (isize + n) % 0x100000000
+                self.fileobj.write(encoder.compress(view[:n]))
 
         crc32 = crc32 & 0xffffffff
         self.fileobj.write(encoder.flush())
 
         self.fileobj.write(struct.pack(FOOTER_FORMAT, crc32, isize))
 
+        gzipinfo.CRC32, gzipinfo.ISIZE = crc32, isize
+
+        if autolevel:
+            autolevel.record(gzipinfo, self.fileobj.tell() - gzipinfo._data_offset - FOOTER_SIZE)
+
+        if self.mode == 'a+':
+            self.gzipinfos.extend(_unpack_solid(gzipinfo))
+            self._end_offset = self.fileobj.tell()
+
+        return gzipinfo
+
     def extract(self, filename=None, gzipinfo=None):
         """Extract a file from the archive as a file object."""
 
-        if self.mode != 'r':
+        if self.mode not in ('r', 'a+'):
             raise IOError('file not open for reading')
 
         if filename:
@@ -437,37 +1701,215 @@ class GzipFile:
         if gzipinfo is None or gzipinfo not in self.gzipinfos:
             raise ValueError('Nothing to extract')
 
-        self.fileobj.seek(gzipinfo._data_offset)
+        fileobj = self._fileobj_for(gzipinfo)
 
-        buff = b''
-        # We must set windowbits < 0 to get the data
-        # (de-)compressed in raw deflate format.
-        # [zlib 1.2.8 Manual: VIII. Advanced Functions]
-        decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+        # The chunks are joined at once rather than concatenated one
+        # by one. The read buffer of the archive is reused.
+        buff = b''.join(_iter_content(fileobj, gzipinfo, self.bufsize, self._buffer))
 
-        while True:
-            buff += decoder.decompress(self.fileobj.read(BUFSIZE))
-            if decoder.unused_data != b'':
-                break
-
-        buff += decoder.flush()
+        # Files in a solid member, and members whose CRC32 and ISIZE
+        # were taken from elsewhere (e.g. a shard manifest), have not
+        # been checked at load.
+        if not gzipinfo._verified:
+            crc32 = zlib.crc32(buff) & 0xffffffff
+            if crc32 != gzipinfo.CRC32:
+                raise BadChecksum('invalid CRC32 checksum: {} != {}'.format(crc32, gzipinfo.CRC32))
+            elif len(buff) % 0x100000000 != gzipinfo.ISIZE:
+                raise BadChecksum('incorrect file length: {} != {}'.format(len(buff), gzipinfo.ISIZE))
 
         return io.BytesIO(buff)
 
+    def search(self, pattern, members=None, workers=1, firstonly=False):
+        """Search the contents of members for <pattern> line by line.
+
+           Return an iterator of (gzipinfo, offset, line) tuples, where
+           <offset> is the position of the line in the decompressed
+           member. If <firstonly> is true, stop scanning each member at
+           its first match. With <workers> > 1, members are searched in
+           parallel and the results are yielded as soon as found.
+        """
+
+        if self.mode not in ('r', 'a+'):
+            raise IOError('file not open for reading')
+
+        if not hasattr(pattern, 'search'):
+            if not isinstance(pattern, bytes):
+                pattern = pattern.encode('utf-8')
+            pattern = re.compile(pattern, re.MULTILINE)
+
+        if members is None:
+            members = self.gzipinfos
+        else:
+            infos = []
+            for member in members:
+                info = member
+                if not isinstance(member, GzipInfo):
+                    info = self.getinfo(member)
+                if info is None:
+                    raise ValueError("No such file in the archive: '{}'".format(member))
+                infos.append(info)
+            members = infos
+
+        # Workers reopen the files by name, so that each has its own
+        # file pointer. File objects without a path (e.g. a temporary
+        # file, whose name is a file descriptor) are searched serially.
+        reopenable = all(_path_of(self._fileobj_for(info)) for info in members)
+
+        if workers > 1 and len(members) > 1 and reopenable:
+            return self._search_parallel(pattern, members, workers, firstonly)
+
+        return self._search_serial(pattern, members, firstonly)
+
+    def _search_serial(self, pattern, members, firstonly):
+        for info in members:
+            for res in _grep(self._fileobj_for(info), info, pattern, firstonly,
+                             bufsize=self.bufsize):
+                yield res
+
+    def _search_parallel(self, pattern, members, workers, firstonly):
+        tasks = queue.Queue()
+        results = queue.Queue()
+        stop = threading.Event()
+        done = object()
+
+        for info in members:
+            tasks.put(info)
+
+        def worker():
+            # Each worker needs its own file pointers.
+            fps = {}
+            try:
+                while not stop.is_set():
+                    try:
+                        info = tasks.get_nowait()
+                    except queue.Empty:
+                        break
+
+                    name = _path_of(self._fileobj_for(info))
+                    if name not in fps:
+                        fps[name] = open(name, 'rb')
+
+                    for res in _grep(fps[name], info, pattern, firstonly, stop, self.bufsize):
+                        results.put(res)
+            except Exception as e:
+                results.put(e)
+            finally:
+                for fp in fps.values():
+                    fp.close()
+                results.put(done)
+
+        threads = []
+        for i in range(min(workers, len(members))):
+            thread = threading.Thread(target=worker)
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+
+        try:
+            running = len(threads)
+            while running:
+                res = results.get()
+                if res is done:
+                    running -= 1
+                elif isinstance(res, Exception):
+                    raise res
+                else:
+                    yield res
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    def addsolid(self, files, compresslevel=6, maxsize=SOLID_MAXSIZE):
+        """Pack many small files into solid members.
+
+           <files> is a list of file paths or (filename, data, mtime)
+           tuples. The files are concatenated into a single member until
+           the table of contents fills up the extra field or the member
+           reaches <maxsize> bytes, in which case a new member is started.
+           Return the list of GzipInfo objects of the solid members.
+        """
+
+        if self.mode not in ('w', 'a', 'a+'):
+            raise IOError('file not writible')
+
+        res = []
+        entries, datas, size, tocsize = [], [], 0, 0
+
+        for item in files:
+            if isinstance(item, tuple):
+                filename, data, mtime = item
+            else:
+                with open(item, 'rb') as fp:
+                    data = fp.read()
+                filename, mtime = os.path.basename(item), int(os.path.getmtime(item))
+
+            if entries and (size + len(data) > maxsize or tocsize + _toc_size(filename) > SOLID_MAXTOC):
+                res.append(self._addsolid(entries, datas, compresslevel))
+                entries, datas, size, tocsize = [], [], 0, 0
+
+            entries.append((filename, mtime, size, len(data), zlib.crc32(data) & 0xffffffff))
+            datas.append(data)
+            size += len(data)
+            tocsize += _toc_size(filename)
+
+        if entries:
+            res.append(self._addsolid(entries, datas, compresslevel))
+
+        return res
+
+    def _addsolid(self, entries, datas, compresslevel):
+        info = GzipInfo()
+        info.MTIME = int(time.time())
+        info.set_operating_system()
+        info.set_extra_flag(self._resolve_level(compresslevel)[0])
+        info.set_exfield(_pack_toc(entries))
+
+        return self.add(io.BytesIO(b''.join(datas)), gzipinfo=info, compresslevel=compresslevel)
+
+    def open_stream(self, members=None):
+        """Return a read-only, seekable raw stream (MemberStream) over
+           the concatenated contents of all members (or <members>).
+           Wrap it with io.BufferedReader() for buffered reads.
+        """
+
+        if self.mode not in ('r', 'a+'):
+            raise IOError('file not open for reading')
+
+        if members is None:
+            members = self.gzipinfos
+
+        segments = []
+        for info in members:
+            fileobj = self._fileobj_for(info)
+            skip, length = info._solid or (0, info.ISIZE)
+
+            # Consecutive files in a solid member form a single segment,
+            # so that the member is not re-inflated for every file.
+            if segments and info._solid is not None:
+                last = segments[-1]
+                if last[:2] == (fileobj, info._data_offset) and last[2] + last[3] == skip:
+                    segments[-1] = last[:3] + (last[3] + length,)
+                    continue
+
+            segments.append((fileobj, info._data_offset, skip, length))
+
+        return MemberStream(segments, self.bufsize)
+
     # Methods to manipulate the files on the current working
     # directory.
     def addfile(self, filepath, compresslevel=6, exfield=None, comment=None,
-                crc16=False, isascii=False):
+                crc16=False, isascii=False, pipeline=False):
         """Write the contents of <filepath> to the archive with the specified
            attributes.
         """
 
-        if self.mode not in ('w', 'a'):
+        if self.mode not in ('w', 'a', 'a+'):
             raise IOError('file not writible')
 
         info = GzipInfo.fromfilepath(filepath)
         info.set_operating_system()
-        info.set_extra_flag(compresslevel)
+        info.set_extra_flag(self._resolve_level(compresslevel)[0])
 
         if exfield:
             info.set_exfield(exfield)
@@ -482,12 +1924,17 @@ class GzipFile:
             info.set_ascii()
 
         with open(filepath, 'rb') as fileobj:
-            self.add(fileobj, gzipinfo=info, compresslevel=compresslevel)
+            return self.add(fileobj, gzipinfo=info, compresslevel=compresslevel,
+                            pipeline=pipeline)
 
-    def extractfile(self, filename):
-        """Extract <filename> to the current working directory."""
+    def extractfile(self, filename, pipeline=False):
+        """Extract <filename> to the current working directory.
 
-        if self.mode != 'r':
+           If <pipeline> is true, reading, decompression and writing run
+           concurrently in separate threads.
+        """
+
+        if self.mode not in ('r', 'a+'):
             raise IOError('file not open for reading')
 
         info = self.getinfo(filename)
@@ -496,7 +1943,10 @@ class GzipFile:
             raise ValueError("No such file in the archive: '{}'".format(filename))
 
         with open(filename, 'wb') as fw:
-            fw.write(self.extract(gzipinfo=info).read())
+            if pipeline and info._solid is None:
+                _extract_pipelined(self._fileobj_for(info), info, fw)
+            else:
+                fw.write(self.extract(gzipinfo=info).read())
 
         os.utime(filename, (int(time.time()), info.MTIME))
 
@@ -504,12 +1954,12 @@ class GzipFile:
                 comment=None, crc16=False, isascii=False):
         """Add binary data to the end of the archive"""
 
-        if self.mode not in ('w', 'a'):
+        if self.mode not in ('w', 'a', 'a+'):
             raise IOError('file not writible')
 
         info = GzipInfo()
         info.set_operating_system()
-        info.set_extra_flag(compresslevel)
+        info.set_extra_flag(self._resolve_level(compresslevel)[0])
 
         if mtime is not None:
             info.MTIME = mtime
@@ -531,7 +1981,287 @@ class GzipFile:
         if isascii:
             info.set_ascii()
 
-        self.add(io.BytesIO(data), gzipinfo=info, compresslevel=compresslevel)
+        return self.add(io.BytesIO(data), gzipinfo=info, compresslevel=compresslevel)
+
+    def adddata_many(self, records, compresslevel=6, bufsize=BATCH_BUFSIZE):
+        """Add many small records to the end of the archive at once.
+
+           <records> is an iterable of bytes, or of dicts holding the
+           keyword arguments of adddata() ('data' is required). The fixed
+           headers are cached and the output is buffered into writes of
+           about <bufsize> bytes. Return the number of members added.
+
+           A single compressor is shared by all the records: each record
+           is full flushed, which resets the compressor state, and the
+           stream is terminated with an empty final block. This avoids
+           setting up a new deflate state for every record at the cost
+           of a few extra bytes per member.
+        """
+
+        if self.mode not in ('w', 'a', 'a+'):
+            raise IOError('file not writible')
+
+        if self.mode == 'a+':
+            self.fileobj.seek(self._end_offset)
+
+        # The OS and XFL fields are the same for all the records.
+        base = GzipInfo()
+        base.set_operating_system()
+        compresslevel = self._resolve_level(compresslevel)[0]
+        base.set_extra_flag(compresslevel)
+
+        encoder = zlib.compressobj(compresslevel, zlib.DEFLATED, -zlib.MAX_WBITS)
+
+        pack_header = struct.Struct(HEADER_FORMAT).pack
+        pack_footer = struct.Struct(FOOTER_FORMAT).pack
+        headers = {}
+
+        offset = self.fileobj.tell()
+        buff = bytearray()
+        count = 0
+
+        for record in records:
+            if isinstance(record, dict):
+                data = record['data']
+                mtime = record.get('mtime')
+                filename = record.get('filename')
+                exfield = record.get('exfield')
+                comment = record.get('comment')
+                crc16 = record.get('crc16')
+                isascii = record.get('isascii')
+            else:
+                data = record
+                mtime = filename = exfield = comment = crc16 = isascii = None
+
+            if mtime is None:
+                mtime = int(time.time())
+
+            flg = 0
+            if exfield:
+                flg |= FEXTRA
+            if filename:
+                flg |= FNAME
+            if comment:
+                flg |= FCOMMENT
+            if crc16:
+                flg |= FHCRC
+            if isascii:
+                flg |= FTEXT
+
+            header = headers.get((flg, mtime))
+            if header is None:
+                if len(headers) > 64:
+                    headers.clear()
+                header = headers[(flg, mtime)] = \
+                    pack_header(GZIP_MAGIC, 8, flg, mtime, base.XFL, base.OS)
+
+            start = len(buff)
+            buff += header
+
+            if exfield:
+                buff += struct.pack('<H', len(exfield))
+                buff += exfield
+            if filename:
+                buff += filename.encode(FIELD_ENCODING) + b'\x00'
+            if comment:
+                buff += comment.encode(FIELD_ENCODING) + b'\x00'
+            if crc16:
+                buff += struct.pack('<H', zlib.crc32(bytes(buff[start:])) & 0xffff)
+
+            data_offset = offset + len(buff)
+            crc32 = zlib.crc32(data) & 0xffffffff
+            isize = len(data) % 0x100000000
+
+            buff += encoder.compress(data)
+            buff += encoder.flush(zlib.Z_FULL_FLUSH)
+            buff += DEFLATE_END
+            buff += pack_footer(crc32, isize)
+            count += 1
+
+            if self.mode == 'a+':
+                info = GzipInfo(FLG=flg, MTIME=mtime, XFL=base.XFL, OS=base.OS, EXFIELD=exfield,
+                                FNAME=filename or None, FCOMMENT=comment or None)
+                info.CRC32, info.ISIZE = crc32, isize
+                info._data_offset = data_offset
+                self.gzipinfos.append(info)
+
+            if len(buff) >= bufsize:
+                self.fileobj.write(buff)
+                offset += len(buff)
+                buff = bytearray()
+
+        self.fileobj.write(buff)
+        self._end_offset = offset + len(buff)
+
+        return count
+
+#--------------------
+# Sharded archives
+#--------------------
+class ShardedGzipWriter:
+    """Write members into a set of gzip archives (shards), rolling over
+       to a new shard once the current one reaches one of the caps:
+
+         maxsize     - compressed size of the shard in bytes.
+         maxisize    - total uncompressed size of the members.
+         maxmembers  - number of the members.
+
+       A member is never split across shards, so a shard may exceed
+       the size caps by the size of its last member. The shards are
+       named '<prefix>.0000.gz', '<prefix>.0001.gz' and so on, and the
+       location of each member is recorded in '<prefix>.manifest'.
+    """
+
+    def __init__(self, prefix, maxsize=None, maxisize=None, maxmembers=None):
+        self.prefix = prefix
+        self.maxsize = maxsize
+        self.maxisize = maxisize
+        self.maxmembers = maxmembers
+        self.manifest = prefix + '.manifest'
+        self.closed = False
+
+        self.shards = []
+        self.members = []
+
+        self._gzip = None
+        self._isize = 0
+        self._count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def _current(self):
+        """Return the shard being written, opening a new one if needed"""
+        if self._gzip is None:
+            path = '{}.{:04d}.gz'.format(self.prefix, len(self.shards))
+            self._gzip = GzipFile.open(path, mode='w')
+            self._isize, self._count = 0, 0
+            self.shards.append(path)
+
+        return self._gzip
+
+    def _rollover(self):
+        self._gzip.close()
+        self._gzip = None
+        self._write_manifest()
+
+    def _write(self, method, *args, **kwargs):
+        gzip = self._current()
+
+        offset = gzip.fileobj.tell()
+        info = getattr(gzip, method)(*args, **kwargs)
+        size = gzip.fileobj.tell() - offset
+
+        self.members.append({
+            'shard': len(self.shards) - 1,
+            'offset': offset,
+            'size': size,
+            'isize': info.ISIZE,
+            'crc32': info.CRC32,
+            'filename': info.FNAME
+        })
+
+        self._isize += info.ISIZE
+        self._count += 1
+
+        if (self.maxsize and gzip.fileobj.tell() >= self.maxsize) or \
+           (self.maxisize and self._isize >= self.maxisize) or \
+           (self.maxmembers and self._count >= self.maxmembers):
+            self._rollover()
+
+        return info
+
+    def _write_manifest(self):
+        # Store the shard paths relative to the manifest, so that the
+        # shard set can be moved as a whole.
+        manifest = {
+            'shards': [os.path.basename(path) for path in self.shards],
+            'members': self.members
+        }
+
+        with open(self.manifest, 'w') as fp:
+            json.dump(manifest, fp, indent=1)
+
+    def add(self, *args, **kwargs):
+        """Append a file object to the archive. See GzipFile.add()"""
+        return self._write('add', *args, **kwargs)
+
+    def addfile(self, *args, **kwargs):
+        """Append a file to the archive. See GzipFile.addfile()"""
+        return self._write('addfile', *args, **kwargs)
+
+    def adddata(self, *args, **kwargs):
+        """Append binary data to the archive. See GzipFile.adddata()"""
+        return self._write('adddata', *args, **kwargs)
+
+    def close(self):
+        """Close the current shard and write the manifest"""
+        if self.closed:
+            return
+
+        self.closed = True
+        if self._gzip is not None:
+            self._rollover()
+        else:
+            self._write_manifest()
+
+class ShardedGzipFile(GzipFile):
+    """Read a shard set written by ShardedGzipWriter as one archive.
+
+       The member list is built from the manifest and the member headers,
+       so that opening the archive does not decompress the shards.
+    """
+
+    def __init__(self, manifest, bufsize=None):
+        self.shards = []
+
+        with open(manifest) as fp:
+            data = json.load(fp)
+
+        try:
+            basedir = os.path.dirname(manifest)
+            for path in data['shards']:
+                self.shards.append(open(os.path.join(basedir, path), 'rb'))
+
+            # If not specified, the buffer size is chosen from the first
+            # shard, since the shards are of similar sizes.
+            self._setup(None, 'r', False, bufsize, self.shards[0] if self.shards else None)
+
+            for member in data['members']:
+                fileobj = self.shards[member['shard']]
+                fileobj.seek(member['offset'])
+
+                info = GzipInfo.fromheader(fileobj)
+                info.CRC32, info.ISIZE = member['crc32'], member['isize']
+                for entry in _unpack_solid(info):
+                    entry._shard = member['shard']
+                    self.gzipinfos.append(entry)
+        except:
+            self.close()
+            raise
+
+    @classmethod
+    def open(cls, manifest, bufsize=None):
+        """Open a shard set from the manifest. Return ShardedGzipFile object"""
+        return cls(manifest, bufsize=bufsize)
+
+    def refresh(self):
+        raise IOError('not supported for shard sets')
+
+    def follow(self, interval=1.0, timeout=None):
+        raise IOError('not supported for shard sets')
+
+    def _fileobj_for(self, gzipinfo):
+        return self.shards[gzipinfo._shard]
+
+    def close(self):
+        """Close all the shards"""
+        self.closed = True
+        for fileobj in self.shards:
+            fileobj.close()
 
 #--------------------
 # Entry Point
@@ -547,7 +2277,7 @@ def main():
     except ImportError:
         _input = input
 
-    COMPRESS, DECOMPRESS, LIST = 1, 2, 3
+    COMPRESS, DECOMPRESS, LIST, GREP = 1, 2, 3, 4
     action, archive, mode = None, None, None
     compresslevel = 6
     comment = None
@@ -556,10 +2286,19 @@ def main():
     isascii = False
     content = None
     encoding = 'utf-8'
+    firstonly = False
+    workers = 1
+    recover = False
+    solid = False
+    follow = False
+    pipeline = False
+    bufsize = None
 
     # Parameter processing
-    shortopts = 'a:c:d:l:'
-    longopts = ('level=', 'comment=', 'content=', 'exfield=', 'encoding=', 'ascii', 'crc16', 'help')
+    shortopts = 'a:c:d:l:g:'
+    longopts = ('level=', 'comment=', 'content=', 'exfield=', 'encoding=', 'ascii', 'crc16', 'help',
+                'grep=', 'files-with-matches', 'workers=', 'recover', 'solid', 'follow', 'pipeline',
+                'target-mbps=', 'bufsize=')
 
     opts, args = getopt.getopt(sys.argv[1:], shortopts, longopts)
     for key, val in opts:
@@ -575,6 +2314,9 @@ def main():
         elif key == '-l':
             action = LIST
             archive = val
+        elif key in ('-g', '--grep'):
+            action = GREP
+            archive = val
         elif key == '--level':
             compresslevel = int(val)
         elif key == '--comment':
@@ -589,23 +2331,49 @@ def main():
             crc16 = True
         elif key == '--ascii':
             isascii = True
+        elif key == '--files-with-matches':
+            firstonly = True
+        elif key == '--workers':
+            workers = int(val)
+        elif key == '--recover':
+            recover = True
+        elif key == '--solid':
+            solid = True
+        elif key == '--follow':
+            follow = True
+        elif key == '--pipeline':
+            pipeline = True
+        elif key == '--target-mbps':
+            compresslevel = AutoLevel(float(val))
+        elif key == '--bufsize':
+            bufsize = int(val)
         elif key == '--help':
             print(__doc__, file=sys.stderr)
             sys.exit(0)
 
-    if not action or (action == COMPRESS and not (args or content)):
+    if not action or (action == COMPRESS and not (args or content)) \
+                  or (action == GREP and not args):
         print(__doc__, file=sys.stderr)
         sys.exit(1)
 
+    if action == COMPRESS and pipeline and isinstance(compresslevel, AutoLevel):
+        logging.error('--pipeline cannot be used with --target-mbps')
+        sys.exit(1)
+
+    if bufsize is not None and bufsize < 1:
+        logging.error('--bufsize must be 1 or more')
+        sys.exit(1)
+
     # Main
     if action == COMPRESS and content:
-        with GzipFile.open(archive, mode=mode) as gzip:
+        with GzipFile.open(archive, mode=mode, bufsize=bufsize) as gzip:
             data = content.encode(encoding)
             gzip.adddata(data, compresslevel=compresslevel, exfield=exfield,
                          comment=comment, crc16=crc16, isascii=isascii)
 
     elif action == COMPRESS and args:
-        with GzipFile.open(archive, mode=mode) as gzip:
+        with GzipFile.open(archive, mode=mode, bufsize=bufsize) as gzip:
+            targets = []
             for filename in args:
                 if not os.path.exists(filename) or not os.path.isfile(filename):
                     logging.warning("'{}' is not a regular file".format(filename))
@@ -615,11 +2383,18 @@ def main():
                     continue
 
                 logging.info('adding: {}'.format(filename))
-                gzip.addfile(filename, compresslevel=compresslevel, exfield=exfield,
-                             comment=comment, crc16=crc16, isascii=isascii)
+                if solid:
+                    targets.append(filename)
+                else:
+                    gzip.addfile(filename, compresslevel=compresslevel, exfield=exfield,
+                                 comment=comment, crc16=crc16, isascii=isascii,
+                                 pipeline=pipeline)
+
+            if targets:
+                gzip.addsolid(targets, compresslevel=compresslevel)
 
     elif action == DECOMPRESS:
-        with GzipFile.open(archive) as gzip:
+        with GzipFile.open(archive, recover=recover, bufsize=bufsize) as gzip:
             if args:
                 targets = args
             else:
@@ -630,12 +2405,41 @@ def main():
                     if _input('{} exists. overwrite? [y/n]: '.format(filename)) != 'y':
                         continue
                 logging.info('extracting: {}'.format(filename))
-                gzip.extractfile(filename)
+                gzip.extractfile(filename, pipeline=pipeline)
+
+    elif action == LIST and follow:
+        with GzipFile.open(archive, follow=True, bufsize=bufsize) as gzip:
+            for info in gzip.getinfolist():
+                print(TEMPLATE_FULL.format(**info.__dict__))
+            try:
+                for info in gzip.follow():
+                    print(TEMPLATE_FULL.format(**info.__dict__))
+                    sys.stdout.flush()
+            except KeyboardInterrupt:
+                pass
 
     elif action == LIST:
-        with GzipFile.open(archive) as gzip:
+        with GzipFile.open(archive, recover=recover, bufsize=bufsize) as gzip:
             for info in gzip.getinfolist():
                 print(TEMPLATE_FULL.format(**info.__dict__))
 
+    elif action == GREP:
+        pattern, members = args[0].encode(encoding), (args[1:] or None)
+        with GzipFile.open(archive, recover=recover, bufsize=bufsize) as gzip:
+            results = gzip.search(pattern, members=members, workers=workers,
+                                  firstonly=firstonly)
+            for info, offset, line in results:
+                if firstonly:
+                    print(info.FNAME)
+                else:
+                    print('{}:{}:{}'.format(info.FNAME, offset, line.decode(encoding, 'replace')))
+
+    # Show the levels chosen by --target-mbps
+    if action == COMPRESS and isinstance(compresslevel, AutoLevel):
+        for stat in compresslevel.stats:
+            logging.info('{}: level {}, {:.1f} MB/s, {} -> {} bytes'.format(
+                stat['filename'], '/'.join(map(str, stat['levels'])), stat['mbps'],
+                stat['isize'], stat['csize']))
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+
+"""Measure the effect of the I/O buffer size on arcgzip
+
+Usage: benchmark.py [-v] [bufsize ...]
+
+  -v    Also print the buffer size chosen, and the size and the number
+        of members of each archive.
+
+Two archives are built in a temporary directory; one with many small
+members and one with a single large member. Each archive is loaded,
+extracted and written with the given buffer sizes (default: 16 KiB,
+automatic and 1 MiB), and with the 'baseline' loops which read into a
+new bytes object per BUFSIZE and concatenate the output with +=, as
+arcgzip did before the buffers were made reusable.
+"""
+
+from __future__ import print_function
+import getopt
+import io
+import os
+import shutil
+import sys
+import tempfile
+import struct
+import time
+import zlib
+
+from arcgzip import GzipFile, GzipInfo, EmptyHeader, BUFSIZE, MAX_BUFSIZE, \
+                    FOOTER_FORMAT, FOOTER_SIZE
+
+SMALL_MEMBERS = 5000
+SMALL_SIZE = 200
+LARGE_SIZE = 1024 * 1024 * 32
+
+def make_data(size):
+    """Return pseudo-random bytes which compress to about a half"""
+    words = [os.urandom(4) for i in range(256)]
+    chunks = []
+    for i in range(size // 8):
+        chunks.append(words[i * 31 % 251])
+        chunks.append(os.urandom(4))
+    return b''.join(chunks)
+
+def measure(func):
+    start = time.time()
+    func()
+    return time.time() - start
+
+def baseline_write(archive, records):
+    with open(archive, 'wb') as fp:
+        for data in records:
+            src = io.BytesIO(data)
+            fp.write(GzipInfo().tobuf())
+
+            crc32, isize = 0, 0
+            encoder = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+            while True:
+                chunk = src.read(BUFSIZE)
+                if chunk == b'':
+                    break
+                crc32 = zlib.crc32(chunk, crc32)
+                isize = (isize + len(chunk)) % 0x100000000
+                fp.write(encoder.compress(chunk))
+
+            fp.write(encoder.flush())
+            fp.write(struct.pack(FOOTER_FORMAT, crc32 & 0xffffffff, isize))
+
+def baseline_load(fp):
+    infos = []
+    while True:
+        try:
+            info = GzipInfo.fromheader(fp)
+        except EmptyHeader:
+            return infos
+
+        decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+        crc32, isize = 0, 0
+        while True:
+            data = decoder.decompress(fp.read(BUFSIZE))
+            crc32 = zlib.crc32(data, crc32)
+            isize = (isize + len(data)) % 0x100000000
+            if decoder.unused_data != b'':
+                fp.seek(-len(decoder.unused_data), 1)
+                break
+
+        zlib.crc32(decoder.flush(), crc32)
+        fp.read(FOOTER_SIZE)
+        infos.append(info)
+
+def baseline_extract(fp, infos, info):
+    # GzipFile.extract() also checks that the member is in the archive.
+    if info not in infos:
+        raise ValueError('Nothing to extract')
+
+    fp.seek(info._data_offset)
+
+    buff = b''
+    decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+    while True:
+        buff += decoder.decompress(fp.read(BUFSIZE))
+        if decoder.unused_data != b'':
+            break
+    buff += decoder.flush()
+
+    return io.BytesIO(buff)
+
+def run_baseline(name, archive, records):
+    def write():
+        baseline_write(archive, records)
+
+    def load():
+        with open(archive, 'rb') as fp:
+            baseline_load(fp)
+
+    def extract():
+        with open(archive, 'rb') as fp:
+            infos = baseline_load(fp)
+            for info in infos:
+                baseline_extract(fp, infos, info).read()
+
+    res = [measure(func) for func in (write, load, extract)]
+    print('{:<8} {:>10} {:>9.3f}s {:>9.3f}s {:>9.3f}s'.format(name, 'baseline', *res))
+
+def run(name, archive, records, bufsize, verbose=False):
+    def write():
+        with GzipFile.open(archive, mode='w', bufsize=bufsize) as gzip:
+            for data in records:
+                gzip.add(io.BytesIO(data))
+
+    def load():
+        with GzipFile.open(archive, bufsize=bufsize) as gzip:
+            pass
+
+    def extract():
+        with GzipFile.open(archive, bufsize=bufsize) as gzip:
+            for info in gzip.getinfolist():
+                gzip.extract(gzipinfo=info).read()
+
+    res = [measure(func) for func in (write, load, extract)]
+    label = 'auto' if bufsize is None else str(bufsize)
+    print('{:<8} {:>10} {:>9.3f}s {:>9.3f}s {:>9.3f}s'.format(name, label, *res))
+
+    if verbose:
+        with GzipFile.open(archive, bufsize=bufsize) as gzip:
+            print('         buffer {} bytes, archive {} bytes, {} members'.format(
+                gzip.bufsize, os.path.getsize(archive), len(gzip.getinfolist())))
+
+def main():
+    opts, args = getopt.getopt(sys.argv[1:], 'v')
+    verbose = False
+
+    for key, val in opts:
+        if key == '-v':
+            verbose = True
+
+    bufsizes = [int(val) for val in args] or [BUFSIZE, None, MAX_BUFSIZE]
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        archive = os.path.join(tmpdir, 'bench.gz')
+        small = [make_data(SMALL_SIZE) for i in range(SMALL_MEMBERS)]
+        large = [make_data(LARGE_SIZE)]
+
+        print('{:<8} {:>10} {:>10} {:>10} {:>10}'.format('archive', 'bufsize', 'write', 'load', 'extract'))
+        run_baseline('small', archive, small)
+        for bufsize in bufsizes:
+            run('small', archive, small, bufsize, verbose)
+        run_baseline('large', archive, large)
+        for bufsize in bufsizes:
+            run('large', archive, large, bufsize, verbose)
+    finally:
+        shutil.rmtree(tmpdir)
+
+if __name__ == "__main__":
+    main()
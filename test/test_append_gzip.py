@@ -0,0 +1,114 @@
+import unittest
+import os
+import tempfile
+import shutil
+from arcgzip import GzipFile, GzipError
+
+class TestAppendGzip(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filepath = os.path.join(self.tmpdir, 'test.gz')
+
+        with GzipFile.open(self.filepath, mode='w') as gzip:
+            gzip.adddata(b'artichoke', filename='first')
+            gzip.adddata(b'cauliflower', filename='second')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_append_and_query(self):
+        with GzipFile.open(self.filepath, mode='a+') as gzip:
+            self.assertEqual(len(gzip.getinfolist()), 2)
+
+            self.assertEqual(gzip.extract('first').read(), b'artichoke')
+            gzip.adddata(b'broccoli', filename='third')
+
+            info = gzip.getinfo('third')
+            self.assertEqual(info.ISIZE, 8)
+            self.assertEqual(gzip.extract(gzipinfo=info).read(), b'broccoli')
+            self.assertEqual(len(gzip.getinfolist()), 3)
+
+        with GzipFile.open(self.filepath) as gzip:
+            names = [info.FNAME for info in gzip.getinfolist()]
+            self.assertEqual(names, ['first', 'second', 'third'])
+
+    def test_new_archive(self):
+        filepath = os.path.join(self.tmpdir, 'new.gz')
+
+        with GzipFile.open(filepath, mode='a+') as gzip:
+            self.assertEqual(gzip.getinfolist(), [])
+            gzip.adddata(b'kale', filename='leaf')
+
+        with GzipFile.open(filepath) as gzip:
+            self.assertEqual(gzip.extract('leaf').read(), b'kale')
+
+    def test_partial_member(self):
+        size = os.path.getsize(self.filepath)
+        with open(self.filepath, 'ab') as fp:
+            fp.write(b'\x1f\x8b\x08\x00')
+
+        with self.assertRaises(GzipError):
+            GzipFile.open(self.filepath, mode='a+')
+
+        with GzipFile.open(self.filepath, mode='a+', truncate=True) as gzip:
+            self.assertEqual(len(gzip.getinfolist()), 2)
+
+        self.assertEqual(os.path.getsize(self.filepath), size)
+
+    def test_torn_write(self):
+        size = os.path.getsize(self.filepath)
+        lines = b''.join(b'line %d\n' % i for i in range(10000))
+
+        with GzipFile.open(self.filepath, mode='a') as gzip:
+            gzip.adddata(lines, filename='third')
+        with open(self.filepath, 'rb') as fp:
+            data = fp.read()
+
+        for i in range(5):
+            with open(self.filepath, 'wb') as fp:
+                fp.write(data[:size + 3000] + os.urandom(4096))
+
+            with self.assertRaises(GzipError):
+                GzipFile.open(self.filepath, mode='a+')
+
+            with GzipFile.open(self.filepath, mode='a+', truncate=True) as gzip:
+                self.assertEqual(len(gzip.getinfolist()), 2)
+                gzip.adddata(b'kale', filename='leaf')
+
+            with GzipFile.open(self.filepath) as gzip:
+                self.assertEqual([info.FNAME for info in gzip.getinfolist()],
+                                 ['first', 'second', 'leaf'])
+
+    def test_not_gzip(self):
+        filepath = os.path.join(self.tmpdir, 'notes.txt')
+        with open(filepath, 'wb') as fp:
+            fp.write(b'some notes\n' * 150)
+
+        with self.assertRaises(GzipError):
+            GzipFile.open(filepath, mode='a+', truncate=True)
+        self.assertEqual(os.path.getsize(filepath), 1650)
+
+        # Garbage after the last member is not cut off either.
+        size = os.path.getsize(self.filepath)
+        with open(self.filepath, 'ab') as fp:
+            fp.write(b'garbage')
+
+        with self.assertRaises(GzipError):
+            GzipFile.open(self.filepath, mode='a+', truncate=True)
+        self.assertEqual(os.path.getsize(self.filepath), size + 7)
+
+    def test_damage_not_at_end(self):
+        with open(self.filepath, 'rb') as fp:
+            data = fp.read()
+        with open(self.filepath, 'wb') as fp:
+            fp.write(data[:16] + b'\xff' * 4 + data[20:])
+
+        with self.assertRaises(GzipError):
+            GzipFile.open(self.filepath, mode='a+', truncate=True)
+
+        with open(self.filepath, 'rb') as fp:
+            self.assertEqual(len(fp.read()), len(data))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import os
+import io
+import tempfile
+import shutil
+from arcgzip import GzipFile, AutoLevel, AUTO_BLOCKSIZE
+
+class TestAutoLevelGzip(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filepath = os.path.join(self.tmpdir, 'test.gz')
+
+        # Compressible, but not trivially.
+        words = [os.urandom(4).hex().encode() for i in range(500)]
+        self.data = b' '.join(words[i * 7 % 500] for i in range(AUTO_BLOCKSIZE // 2))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_level_down(self):
+        autolevel = AutoLevel(target_mbps=1e9)
+
+        with GzipFile.open(self.filepath, mode='w') as gzip:
+            gzip.adddata(self.data, filename='large', compresslevel=autolevel)
+            gzip.adddata(b'small', filename='small', compresslevel=autolevel)
+
+        self.assertEqual(autolevel.level, 1)
+        self.assertEqual(autolevel.stats[0]['levels'][:2], [6, 5])
+        self.assertEqual(autolevel.stats[1]['levels'], [1])
+
+        with GzipFile.open(self.filepath) as gzip:
+            self.assertEqual(gzip.extract('large').read(), self.data)
+            self.assertEqual(gzip.getinfo('small').XFL, 4)
+
+    def test_level_up(self):
+        with GzipFile.open(self.filepath, mode='w') as gzip:
+            gzip.autolevel.target_mbps = 1e-9
+            gzip.add(io.BytesIO(self.data), compresslevel='auto')
+            gzip.adddata(b'small', filename='small', compresslevel='auto')
+
+            stats = gzip.autolevel.stats
+            self.assertEqual(stats[0]['levels'], [6, 7, 8, 9])
+            self.assertEqual(stats[0]['isize'], len(self.data))
+            self.assertLess(stats[0]['csize'], len(self.data))
+
+        with GzipFile.open(self.filepath) as gzip:
+            infos = gzip.getinfolist()
+            self.assertEqual(gzip.extract(gzipinfo=infos[0]).read(), self.data)
+            self.assertEqual(infos[1].XFL, 2)
+
+    def test_pipeline(self):
+        with GzipFile.open(self.filepath, mode='w') as gzip:
+            with self.assertRaises(ValueError):
+                gzip.add(io.BytesIO(b'data'), compresslevel='auto', pipeline=True)
+
+if __name__ == '__main__':
+    unittest.main()
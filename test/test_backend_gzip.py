@@ -0,0 +1,123 @@
+import unittest
+import os
+import tempfile
+import shutil
+import threading
+from arcgzip import GzipFile, LocalFileBackend, HTTPRangeBackend, BlockCache
+
+try:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+except ImportError:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler # python2.x
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serve a single file with the support of 'Range' requests"""
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self.send_response(200)
+        if self.server.headlength:
+            self.send_header('Content-Length', str(len(self.server.data)))
+        self.end_headers()
+
+    def do_GET(self):
+        data = self.server.data
+        start, end = self.headers['Range'][len('bytes='):].split('-')
+        body = data[int(start):int(end)+1]
+
+        self.server.ranges.append((int(start), int(end)))
+        self.send_response(206)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Content-Range', 'bytes {}-{}/{}'.format(start, end, len(data)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class TestBackendGzip(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filepath = os.path.join(self.tmpdir, 'test.gz')
+
+        self.contents = [os.urandom(100000) for i in range(10)]
+        with GzipFile.open(self.filepath, mode='w') as gzip:
+            for i, data in enumerate(self.contents):
+                gzip.adddata(data, filename='file{}'.format(i))
+
+        with open(self.filepath, 'rb') as fp:
+            self.data = fp.read()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_local_backend(self):
+        backend = LocalFileBackend(self.filepath)
+        with GzipFile.openbackend(backend, blocksize=4096) as gzip:
+            self.assertEqual(len(gzip.getinfolist()), 10)
+            self.assertEqual(gzip.extract('file3').read(), self.contents[3])
+
+    def test_block_cache(self):
+        backend = LocalFileBackend(self.filepath)
+        cache = BlockCache(backend, blocksize=1000, maxblocks=4, readahead=2)
+
+        # Sequential access triggers the read-ahead of blocks 2 and 3.
+        self.assertEqual(cache.read_at(500, 1000), self.data[500:1500])
+        self.assertEqual(cache.requests, 2)
+        self.assertEqual(cache.fetched, 4000)
+
+        self.assertEqual(cache.read_at(1500, 3000), self.data[1500:4500])
+        self.assertEqual(cache.requests, 3)
+        self.assertEqual(cache.fetched, 7000)
+
+        # Block 0 has been evicted.
+        cache.read_at(0, 10)
+        self.assertEqual(cache.requests, 4)
+
+        self.assertEqual(cache.read_at(len(self.data) - 5, 100), self.data[-5:])
+        cache.close()
+
+    def test_small_cache(self):
+        backend = LocalFileBackend(self.filepath)
+        with GzipFile.openbackend(backend, blocksize=4096, maxblocks=2) as gzip:
+            self.assertEqual(gzip.extract('file7').read(), self.contents[7])
+
+        with self.assertRaises(ValueError):
+            BlockCache(backend, maxblocks=0)
+
+    def test_http_backend(self):
+        server = HTTPServer(('127.0.0.1', 0), RangeHandler)
+        server.data = self.data
+        server.ranges = []
+        server.headlength = True
+
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+        try:
+            url = 'http://127.0.0.1:{}/test.gz'.format(server.server_address[1])
+            backend = HTTPRangeBackend(url)
+            self.assertEqual(backend.size(), len(self.data))
+            self.assertEqual(backend.read_at(10, 20), self.data[10:30])
+
+            with GzipFile.open(url) as gzip:
+                infos = gzip.getinfolist()
+                self.assertEqual(len(infos), 10)
+
+                # Extracting a member only fetches the ranges it needs.
+                del server.ranges[:]
+                self.assertEqual(gzip.extract('file5').read(), self.contents[5])
+
+                fetched = sum(end - start + 1 for start, end in server.ranges)
+                self.assertLess(fetched, len(self.data) / 2)
+
+            # A HEAD response without Content-Length
+            server.headlength = False
+            self.assertEqual(HTTPRangeBackend(url).size(), len(self.data))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import os
+import tempfile
+import shutil
+from arcgzip import GzipFile
+
+class TestBatchGzip(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filepath = os.path.join(self.tmpdir, 'test.gz')
+
+        self.records = []
+        for i in range(1000):
+            self.records.append({
+                'data': 'event {}'.format(i).encode() * (i % 5),
+                'mtime': 1412132400 + i // 100,
+                'filename': 'event{}'.format(i),
+                'comment': 'comment' if i % 2 else None,
+                'exfield': b'ex' if i % 3 else None,
+                'crc16': i % 7 == 0,
+                'isascii': i % 11 == 0
+            })
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_same_as_adddata(self):
+        expected = os.path.join(self.tmpdir, 'expected.gz')
+
+        with GzipFile.open(expected, mode='w') as gzip:
+            for record in self.records:
+                gzip.adddata(**record)
+
+        with GzipFile.open(self.filepath, mode='w') as gzip:
+            count = gzip.adddata_many(self.records, bufsize=1000)
+            self.assertEqual(count, 1000)
+
+        with GzipFile.open(expected) as gzip1, GzipFile.open(self.filepath) as gzip2:
+            infos1, infos2 = gzip1.getinfolist(), gzip2.getinfolist()
+            self.assertEqual(len(infos2), 1000)
+
+            for info1, info2 in zip(infos1, infos2):
+                self.assertEqual(info1.__repr__(), info2.__repr__())
+                self.assertEqual((info1.CRC16, info1.CRC32, info1.ISIZE),
+                                 (info2.CRC16, info2.CRC32, info2.ISIZE))
+                self.assertEqual(gzip2.extract(gzipinfo=info2).read(),
+                                 gzip1.extract(gzipinfo=info1).read())
+
+    def test_plain_records(self):
+        with GzipFile.open(self.filepath, mode='w') as gzip:
+            gzip.adddata_many([b'carrot', b'', b'turnip'], compresslevel=1)
+
+        with GzipFile.open(self.filepath) as gzip:
+            infos = gzip.getinfolist()
+            self.assertEqual([gzip.extract(gzipinfo=info).read() for info in infos],
+                             [b'carrot', b'', b'turnip'])
+            self.assertEqual(infos[0].XFL, 4)
+
+    def test_append(self):
+        with GzipFile.open(self.filepath, mode='a+') as gzip:
+            gzip.adddata(b'first', filename='first')
+            gzip.adddata_many(self.records[:10])
+            gzip.adddata(b'last', filename='last')
+
+            self.assertEqual(len(gzip.getinfolist()), 12)
+            info = gzip.getinfo('event4')
+            self.assertEqual(gzip.extract(gzipinfo=info).read(), self.records[4]['data'])
+
+        with GzipFile.open(self.filepath) as gzip:
+            self.assertEqual(len(gzip.getinfolist()), 12)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import os
+import io
+import gzip as gz
+import tempfile
+import shutil
+from arcgzip import GzipFile, GzipInfo, FNAME, BUFSIZE, MAX_BUFSIZE
+
+class ReadOnly(object):
+    """A file object without readinto()"""
+
+    def __init__(self, data):
+        self._fp = io.BytesIO(data)
+
+    def read(self, size=-1):
+        return self._fp.read(size)
+
+class TestBufsizeGzip(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filepath = os.path.join(self.tmpdir, 'test.gz')
+        self.data = [os.urandom(i * 37) * (i % 3 + 1) for i in range(20)]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_tiny_bufsize(self):
+        with GzipFile.open(self.filepath, mode='w', bufsize=17) as gzip:
+            for i, data in enumerate(self.data):
+                gzip.add(io.BytesIO(data), GzipInfo(FLG=FNAME, FNAME='file{}'.format(i)))
+
+        with gz.open(self.filepath) as fp:
+            self.assertEqual(fp.read(), b''.join(self.data))
+
+        with GzipFile.open(self.filepath, bufsize=17) as gzip:
+            infos = gzip.getinfolist()
+            self.assertEqual(len(infos), 20)
+            for info, data in zip(infos, self.data):
+                self.assertEqual(info.ISIZE, len(data))
+                self.assertEqual(gzip.extract(gzipinfo=info).read(), data)
+
+    def test_without_readinto(self):
+        with GzipFile.open(self.filepath, mode='w', bufsize=100) as gzip:
+            gzip.add(ReadOnly(self.data[19]), GzipInfo(FLG=FNAME, FNAME='file'))
+
+        with GzipFile.open(self.filepath) as gzip:
+            self.assertEqual(gzip.extract('file').read(), self.data[19])
+
+    def test_auto_bufsize(self):
+        with GzipFile.open(self.filepath, mode='w') as gzip:
+            gzip.adddata(b'')
+            self.assertEqual(gzip.bufsize, BUFSIZE)
+
+        with open(self.filepath, 'wb') as fp:
+            with gz.GzipFile(fileobj=fp, mode='wb', compresslevel=0) as gzfp:
+                gzfp.write(b'\0' * (MAX_BUFSIZE * 33))
+
+        with GzipFile.open(self.filepath) as gzip:
+            self.assertEqual(gzip.bufsize, MAX_BUFSIZE)
+            self.assertEqual(gzip.getinfolist()[0].ISIZE, MAX_BUFSIZE * 33)
+
+    def test_invalid_bufsize(self):
+        with GzipFile.open(self.filepath, mode='w') as gzip:
+            gzip.adddata(b'kale')
+
+        for bufsize in (0, -1):
+            with self.assertRaises(ValueError):
+                GzipFile.open(self.filepath, mode='w', bufsize=bufsize)
+            with self.assertRaises(ValueError):
+                GzipFile(io.BytesIO(), mode='w', bufsize=bufsize)
+
+        with GzipFile.open(self.filepath) as gzip:
+            self.assertEqual(len(gzip.getinfolist()), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import os
+import tempfile
+import shutil
+from arcgzip import GzipFile
+
+class TestFollowGzip(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filepath = os.path.join(self.tmpdir, 'test.gz')
+        self.member = os.path.join(self.tmpdir, 'member.gz')
+
+        with GzipFile.open(self.member, mode='w') as gzip:
+            gzip.adddata(b'pumpkin' * 1000, filename='squash')
+
+        with open(self.member, 'rb') as fp:
+            self.data = fp.read()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def append(self, data):
+        with open(self.filepath, 'ab') as fp:
+            fp.write(data)
+
+    def test_refresh(self):
+        self.append(self.data)
+
+        with GzipFile.open(self.filepath, follow=True) as gzip:
+            self.assertEqual(len(gzip.getinfolist()), 1)
+            self.assertEqual(gzip.refresh(), [])
+
+            # A partially written member is waited for.
+            for pos in (1, 5, 20, len(self.data) - 1):
+                self.append(self.data[:pos])
+                self.assertEqual(gzip.refresh(), [])
+
+                with open(self.filepath, 'rb+') as fp:
+                    fp.truncate(len(self.data))
+
+            self.append(self.data)
+            new = gzip.refresh()
+            self.assertEqual([info.FNAME for info in new], ['squash'])
+            self.assertEqual(len(gzip.getinfolist()), 2)
+            self.assertEqual(gzip.extract(gzipinfo=new[0]).read(), b'pumpkin' * 1000)
+
+    def test_follow(self):
+        self.append(b'')
+
+        with GzipFile.open(self.filepath, follow=True) as gzip:
+            self.assertEqual(gzip.getinfolist(), [])
+
+            self.append(self.data * 3)
+            new = list(gzip.follow(interval=0.01, timeout=0.05))
+            self.assertEqual(len(new), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import os
+import io
+import tempfile
+import shutil
+from arcgzip import GzipFile, GzipInfo, BadChecksum, BadCompressedData
+
+class FailingReader(io.BytesIO):
+    def read(self, size=-1):
+        if self.tell() > 100000:
+            raise IOError('read error')
+        return io.BytesIO.read(self, size)
+
+class TestPipelineGzip(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmpdir)
+
+        self.data = os.urandom(500000) + b'pepper' * 200000
+        with open('source', 'wb') as fp:
+            fp.write(self.data)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmpdir)
+
+    def test_same_output(self):
+        for path, pipeline in (('plain.gz', False), ('pipeline.gz', True)):
+            with GzipFile.open(path, mode='w') as gzip:
+                info = GzipInfo.fromfilepath('source')
+                with open('source', 'rb') as fp:
+                    gzip.add(fp, gzipinfo=info, pipeline=pipeline)
+
+        with open('plain.gz', 'rb') as fp1, open('pipeline.gz', 'rb') as fp2:
+            self.assertEqual(fp1.read(), fp2.read())
+
+    def test_extractfile(self):
+        with GzipFile.open('test.gz', mode='w') as gzip:
+            gzip.adddata(b'first', filename='first')
+            gzip.addfile('source', pipeline=True)
+            gzip.adddata(b'last', filename='last')
+
+        os.remove('source')
+
+        with GzipFile.open('test.gz') as gzip:
+            gzip.extractfile('source', pipeline=True)
+
+        with open('source', 'rb') as fp:
+            self.assertEqual(fp.read(), self.data)
+
+    def test_bad_checksum(self):
+        with GzipFile.open('test.gz', mode='w') as gzip:
+            gzip.addfile('source')
+
+        with GzipFile.open('test.gz') as gzip:
+            gzip.getinfo('source').CRC32 ^= 1
+            with self.assertRaises(BadChecksum):
+                gzip.extractfile('source', pipeline=True)
+
+    def test_corrupt_data(self):
+        with GzipFile.open('test.gz', mode='w') as gzip:
+            gzip.addfile('source')
+
+        with GzipFile.open('test.gz') as gzip:
+            # Damage the first block header after the member is loaded.
+            with open('test.gz', 'r+b') as fp:
+                fp.seek(gzip.getinfo('source')._data_offset)
+                fp.write(b'\xff' * 16)
+
+            for pipeline in (False, True):
+                with self.assertRaises(BadCompressedData):
+                    gzip.extractfile('source', pipeline=pipeline)
+
+    def test_read_error(self):
+        with GzipFile.open('test.gz', mode='w') as gzip:
+            with self.assertRaises(IOError):
+                gzip.add(FailingReader(self.data), pipeline=True)
+
+if __name__ == '__main__':
+    unittest.main()
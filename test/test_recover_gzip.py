@@ -0,0 +1,98 @@
+import unittest
+import os
+import tempfile
+import shutil
+from arcgzip import GzipFile, GzipError, TruncatedMember, BadCompressedData
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+class TestRecoverGzip(unittest.TestCase):
+    CRC32_FILE = os.path.join(DATA_DIR, 'badcrc32.gz')
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filepath = os.path.join(self.tmpdir, 'test.gz')
+        self.offsets = []
+
+        with GzipFile.open(self.filepath, mode='w') as gzip:
+            for i in range(3):
+                self.offsets.append(gzip.fileobj.tell())
+                gzip.adddata(os.urandom(50000), filename='file{}'.format(i))
+            self.offsets.append(gzip.fileobj.tell())
+
+        with open(self.filepath, 'rb') as fp:
+            self.data = fp.read()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, data):
+        with open(self.filepath, 'wb') as fp:
+            fp.write(data)
+
+    def test_damaged_member(self):
+        start = self.offsets[1] + 1000
+        self.write(self.data[:start] + b'\x00' * 5000 + self.data[start+5000:])
+
+        with self.assertRaises(GzipError):
+            GzipFile.open(self.filepath)
+
+        with GzipFile.open(self.filepath, recover=True) as gzip:
+            infos = gzip.getinfolist()
+            self.assertEqual([info.FNAME for info in infos], ['file0', 'file2'])
+            self.assertEqual(gzip.skipped, [(self.offsets[1], self.offsets[2])])
+            self.assertEqual(len(gzip.extract('file2').read()), 50000)
+
+    def test_corrupt_deflate_data(self):
+        lines = b''.join(b'line %d of the text\n' % i for i in range(5000))
+        offsets = []
+        with GzipFile.open(self.filepath, mode='w') as gzip:
+            for i in range(3):
+                offsets.append(gzip.fileobj.tell())
+                gzip.adddata(lines, filename='file{}'.format(i))
+            offsets.append(gzip.fileobj.tell())
+
+        with open(self.filepath, 'rb') as fp:
+            data = fp.read()
+
+        # Damage the block header of the middle member.
+        start = offsets[1] + 40
+        self.write(data[:start] + b'\xff' * 16 + data[start+16:])
+
+        with self.assertRaises(BadCompressedData):
+            GzipFile.open(self.filepath)
+
+        for i in range(20):
+            with GzipFile.open(self.filepath, recover=True) as gzip:
+                infos = gzip.getinfolist()
+                self.assertEqual([info.FNAME for info in infos], ['file0', 'file2'])
+                self.assertEqual(gzip.skipped, [(offsets[1], offsets[2])])
+                self.assertEqual(gzip.extract('file2').read(), lines)
+
+            start = offsets[1] + 40 + ord(os.urandom(1)) * 16
+            self.write(data[:start] + os.urandom(16) + data[start+16:])
+
+    def test_truncated_member(self):
+        self.write(self.data[:self.offsets[2] + 100])
+
+        with self.assertRaises(TruncatedMember):
+            GzipFile.open(self.filepath)
+
+        with GzipFile.open(self.filepath, recover=True) as gzip:
+            self.assertEqual(len(gzip.getinfolist()), 2)
+            self.assertEqual(gzip.skipped, [(self.offsets[2], self.offsets[2] + 100)])
+
+    def test_garbage_between_members(self):
+        garbage = b'\x1f\x8b\x08garbage' * 100
+        self.write(self.data[:self.offsets[1]] + garbage + self.data[self.offsets[1]:])
+
+        with GzipFile.open(self.filepath, recover=True) as gzip:
+            self.assertEqual(len(gzip.getinfolist()), 3)
+            self.assertEqual(gzip.skipped, [(self.offsets[1], self.offsets[1] + len(garbage))])
+
+    def test_nothing_salvageable(self):
+        with self.assertRaises(IOError):
+            GzipFile.open(self.CRC32_FILE, recover=True)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+import os
+import re
+import tempfile
+import shutil
+from arcgzip import GzipFile, BUFSIZE, _inflate
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+class TestSearchGzip(unittest.TestCase):
+    TEST_FILE = os.path.join(DATA_DIR, 'textfile.gz')
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filepath = os.path.join(self.tmpdir, 'test.gz')
+
+        # Long enough to span many read chunks.
+        lines = [b'line ' + str(i).encode() for i in range(20000)]
+        self.longdata = b'\n'.join(lines)
+
+        with GzipFile.open(self.filepath, mode='w') as gzip:
+            gzip.adddata(b'apple\nbanana\ncherry\n', filename='fruits')
+            gzip.adddata(b'carrot\nonion', filename='vegetables')
+            gzip.adddata(self.longdata, filename='numbers')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_search_lines(self):
+        with GzipFile.open(self.filepath) as gzip:
+            res = [(info.FNAME, offset, line) for info, offset, line in gzip.search('an|ni')]
+
+        self.assertEqual(res, [('fruits', 6, b'banana'), ('vegetables', 7, b'onion')])
+
+    def test_search_textfile(self):
+        with GzipFile.open(self.TEST_FILE) as gzip:
+            res = list(gzip.search(b'^asp'))
+
+        self.assertEqual(len(res), 1)
+        self.assertEqual(res[0][2], b'asparagus')
+
+    def test_chunk_boundaries(self):
+        pattern = re.compile(b'^line 1[0-9]{3}$', re.M)
+        expected = [m.start() for m in pattern.finditer(self.longdata)]
+
+        with GzipFile.open(self.filepath) as gzip:
+            res = [offset for info, offset, line in gzip.search(pattern, members=['numbers'])]
+
+        self.assertEqual(len(expected), 1000)
+        self.assertEqual(res, expected)
+
+    def test_long_lines(self):
+        # Lines longer than a chunk, and a member without any newline
+        # longer than the GREP_MAXLINE limit.
+        longline = b'x' * 50000 + b'needle' + b'x' * 50000
+        with GzipFile.open(self.filepath, mode='w') as gzip:
+            gzip.adddata(longline + b'\nneedle\n' + longline, filename='lines')
+            gzip.adddata(b'y' * 300000 + b'needle' + b'y' * 300000, filename='binary')
+
+        with GzipFile.open(self.filepath, bufsize=1024) as gzip:
+            res = [(info.FNAME, offset, line) for info, offset, line in gzip.search(b'needle')]
+
+        self.assertEqual(res[:3], [('lines', 0, longline),
+                                   ('lines', len(longline) + 1, b'needle'),
+                                   ('lines', len(longline) + 8, longline)])
+        self.assertEqual(len(res), 4)
+
+        name, offset, line = res[3]
+        self.assertEqual(name, 'binary')
+        self.assertTrue(offset <= 300000 and 300006 <= offset + len(line))
+        self.assertEqual(line[300000 - offset:300006 - offset], b'needle')
+
+    def test_bounded_chunks(self):
+        with GzipFile.open(self.filepath, mode='w') as gzip:
+            gzip.adddata(b'\0' * (BUFSIZE * 100), filename='zeros')
+
+        with GzipFile.open(self.filepath, bufsize=1024) as gzip:
+            info = gzip.getinfo('zeros')
+            sizes = [len(chunk) for chunk in _inflate(gzip.fileobj, info._data_offset, 1024)]
+
+        self.assertEqual(sum(sizes), BUFSIZE * 100)
+        self.assertLessEqual(max(sizes), BUFSIZE)
+
+    def test_firstonly(self):
+        with GzipFile.open(self.filepath) as gzip:
+            res = list(gzip.search(b'[ae]', firstonly=True))
+
+        self.assertEqual([info.FNAME for info, offset, line in res],
+                         ['fruits', 'vegetables', 'numbers'])
+        self.assertEqual(res[0][2], b'apple')
+
+    def test_parallel(self):
+        with GzipFile.open(self.filepath) as gzip:
+            serial = sorted((info.FNAME, offset) for info, offset, line in gzip.search(b'r'))
+            parallel = sorted((info.FNAME, offset) for info, offset, line in gzip.search(b'r', workers=3))
+
+        self.assertEqual(serial, parallel)
+
+    def test_parallel_without_path(self):
+        fp = tempfile.TemporaryFile()
+        with open(self.filepath, 'rb') as src:
+            fp.write(src.read())
+        fp.seek(0)
+
+        with GzipFile(fp) as gzip:
+            res = list(gzip.search(b'carrot', workers=2))
+            self.assertEqual([info.FNAME for info, offset, line in res], ['vegetables'])
+            self.assertEqual(gzip.extract('fruits').read(), b'apple\nbanana\ncherry\n')
+
+    def test_unknown_member(self):
+        with GzipFile.open(self.filepath) as gzip:
+            with self.assertRaises(ValueError):
+                gzip.search(b'a', members=['nothing'])
+
+if __name__ == '__main__':
+    unittest.main()
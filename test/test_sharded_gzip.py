@@ -0,0 +1,101 @@
+import unittest
+import os
+import tempfile
+import shutil
+from arcgzip import GzipFile, GzipError, ShardedGzipWriter, ShardedGzipFile, BUFSIZE
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+class TestShardedGzip(unittest.TestCase):
+    FILE_NAME = 'textfile'
+    TEST_FILE = os.path.join(DATA_DIR, FILE_NAME)
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.prefix = os.path.join(self.tmpdir, 'test')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_member_cap(self):
+        with ShardedGzipWriter(self.prefix, maxmembers=2) as writer:
+            for i in range(5):
+                writer.adddata(b'data' * i, filename='file{}'.format(i))
+
+        self.assertEqual(len(writer.shards), 3)
+
+        for path, count in zip(writer.shards, (2, 2, 1)):
+            with GzipFile.open(path) as gzip:
+                self.assertEqual(len(gzip.getinfolist()), count)
+
+    def test_isize_cap(self):
+        with ShardedGzipWriter(self.prefix, maxisize=100) as writer:
+            writer.adddata(b'a' * 60, filename='a')
+            writer.adddata(b'b' * 60, filename='b')
+            writer.adddata(b'c' * 60, filename='c')
+
+        self.assertEqual([m['shard'] for m in writer.members], [0, 0, 1])
+
+    def test_size_cap(self):
+        data = os.urandom(1000)
+
+        with ShardedGzipWriter(self.prefix, maxsize=1500) as writer:
+            for i in range(4):
+                writer.adddata(data, filename=str(i))
+
+        self.assertEqual(len(writer.shards), 2)
+        for path in writer.shards:
+            self.assertLess(os.path.getsize(path), 1500 + 1100)
+
+    def test_read_shards(self):
+        with ShardedGzipWriter(self.prefix, maxmembers=1) as writer:
+            writer.addfile(self.TEST_FILE)
+            writer.adddata(b'carrot', filename='roots', comment='orange')
+
+        with ShardedGzipFile.open(writer.manifest) as gzip, \
+             open(self.TEST_FILE, mode='rb') as orig:
+            infos = gzip.getinfolist()
+            self.assertEqual([info.FNAME for info in infos], [self.FILE_NAME, 'roots'])
+            self.assertEqual(infos[1].FCOMMENT, 'orange')
+            self.assertEqual(infos[1].ISIZE, 6)
+
+            self.assertEqual(gzip.extract(self.FILE_NAME).read(), orig.read())
+            self.assertEqual(gzip.extract('roots').read(), b'carrot')
+
+            res = list(gzip.search(b'rot', workers=2))
+            self.assertEqual([info.FNAME for info, offset, line in res], ['roots'])
+
+    def test_corrupt_shard(self):
+        data = b''.join(b'line %d\n' % i for i in range(200))
+        with ShardedGzipWriter(self.prefix, maxmembers=1) as writer:
+            writer.adddata(data, filename='m1')
+            writer.adddata(data, filename='m2')
+
+        with open(writer.shards[1], 'r+b') as fp:
+            fp.seek(-20, 2)
+            byte = fp.read(1)
+            fp.seek(-20, 2)
+            fp.write(bytearray([ord(byte) ^ 0x01]))
+
+        with ShardedGzipFile.open(writer.manifest) as gzip:
+            self.assertEqual(gzip.extract('m1').read(), data)
+            with self.assertRaises(GzipError):
+                gzip.extract('m2')
+
+    def test_unsupported(self):
+        with ShardedGzipWriter(self.prefix, maxmembers=1) as writer:
+            writer.adddata(b'kale', filename='leaf')
+
+        with ShardedGzipFile.open(writer.manifest) as gzip:
+            self.assertEqual(gzip.bufsize, BUFSIZE)
+            self.assertEqual(gzip.skipped, [])
+            with self.assertRaises(IOError):
+                gzip.refresh()
+            with self.assertRaises(IOError):
+                gzip.follow()
+            with self.assertRaises(IOError):
+                gzip.adddata(b'cress')
+            self.assertEqual(gzip.open_stream().read(), b'kale')
+
+if __name__ == '__main__':
+    unittest.main()
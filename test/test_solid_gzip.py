@@ -0,0 +1,77 @@
+import unittest
+import os
+import tempfile
+import shutil
+from arcgzip import GzipFile, SOLID_MAXTOC
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+class TestSolidGzip(unittest.TestCase):
+    FILE_NAME = 'textfile'
+    TEST_FILE = os.path.join(DATA_DIR, FILE_NAME)
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filepath = os.path.join(self.tmpdir, 'test.gz')
+
+        self.files = [('file{}'.format(i), os.urandom(i * 10), 1412132400 + i)
+                      for i in range(100)]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def count_members(self, gzip):
+        return len(set(info._data_offset for info in gzip.getinfolist()))
+
+    def test_read_solid(self):
+        with GzipFile.open(self.filepath, mode='w') as gzip:
+            gzip.addfile(self.TEST_FILE)
+            gzip.addsolid(self.files)
+
+        with GzipFile.open(self.filepath) as gzip:
+            infos = gzip.getinfolist()
+            self.assertEqual(len(infos), 101)
+            self.assertEqual(self.count_members(gzip), 2)
+
+            for filename, data, mtime in self.files:
+                info = gzip.getinfo(filename)
+                self.assertEqual(info.MTIME, mtime)
+                self.assertEqual(info.ISIZE, len(data))
+                self.assertEqual(gzip.extract(gzipinfo=info).read(), data)
+
+    def test_solid_files(self):
+        with GzipFile.open(self.filepath, mode='w') as gzip:
+            gzip.addsolid([self.TEST_FILE, self.TEST_FILE + '.gz'])
+
+        with GzipFile.open(self.filepath) as gzip, \
+             open(self.TEST_FILE, mode='rb') as orig:
+            self.assertEqual(len(gzip.getinfolist()), 2)
+            self.assertEqual(gzip.extract(self.FILE_NAME).read(), orig.read())
+
+            res = list(gzip.search(b'asparagus'))
+            self.assertEqual([info.FNAME for info, offset, line in res], [self.FILE_NAME])
+
+    def test_split_members(self):
+        with GzipFile.open(self.filepath, mode='w') as gzip:
+            small = gzip.addsolid(self.files, maxsize=10000)
+            for info in small:
+                self.assertLessEqual(info.ISIZE, 10000)
+
+            names = [('x' * 200 + str(i), b'', 0) for i in range(1000)]
+            infos = gzip.addsolid(names)
+            self.assertGreater(len(infos), 1)
+            for info in infos:
+                self.assertLessEqual(len(info.EXFIELD), SOLID_MAXTOC + 4)
+
+        with GzipFile.open(self.filepath) as gzip:
+            self.assertEqual(len(gzip.getinfolist()), 1100)
+            self.assertEqual(self.count_members(gzip), len(small) + len(infos))
+            self.assertEqual(gzip.extract('file99').read(), self.files[99][1])
+
+    def test_append_solid(self):
+        with GzipFile.open(self.filepath, mode='a+') as gzip:
+            gzip.addsolid(self.files[:3])
+            self.assertEqual(gzip.extract('file2').read(), self.files[2][1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import os
+import io
+import random
+import tempfile
+import shutil
+from arcgzip import GzipFile, BUFSIZE
+
+class TestStreamGzip(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filepath = os.path.join(self.tmpdir, 'test.gz')
+
+        self.contents = [os.urandom(i * 37000) for i in range(5)]
+        self.solid = [('file{}'.format(i), os.urandom(i * 100), 0) for i in range(20)]
+
+        with GzipFile.open(self.filepath, mode='w') as gzip:
+            for i, data in enumerate(self.contents):
+                gzip.adddata(data, filename='member{}'.format(i))
+            gzip.addsolid(self.solid)
+            gzip.adddata(b'line1\nline2\n', filename='lines')
+
+        self.data = b''.join(self.contents) + \
+                    b''.join(data for name, data, mtime in self.solid) + b'line1\nline2\n'
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_read_all(self):
+        with GzipFile.open(self.filepath) as gzip:
+            stream = gzip.open_stream()
+            self.assertEqual(stream.read(), self.data)
+            self.assertEqual(stream.read(), b'')
+            self.assertEqual(stream.seek(0, 2), len(self.data))
+
+    def test_seek(self):
+        rand = random.Random(0)
+
+        with GzipFile.open(self.filepath) as gzip:
+            stream = gzip.open_stream()
+            for i in range(50):
+                pos = rand.randint(0, len(self.data))
+                size = rand.randint(0, 50000)
+                stream.seek(pos)
+                self.assertEqual(stream.read(size), self.data[pos:pos+size])
+                self.assertEqual(stream.tell(), min(pos + size, len(self.data)))
+
+            # The file pointer may be moved by the other methods.
+            stream.seek(1000)
+            gzip.extract('lines')
+            self.assertEqual(stream.read(10), self.data[1000:1010])
+
+    def test_bounded_chunks(self):
+        with GzipFile.open(self.filepath, mode='w') as gzip:
+            gzip.adddata(b'\0' * (BUFSIZE * 100) + b'end', filename='zeros')
+
+        with GzipFile.open(self.filepath) as gzip:
+            stream = gzip.open_stream()
+            stream.seek(10)
+            self.assertEqual(stream.read(10), b'\0' * 10)
+            self.assertLessEqual(len(stream._chunk), BUFSIZE)
+
+            stream.seek(BUFSIZE * 100 - 2)
+            self.assertEqual(stream.read(), b'\0\0end')
+
+    def test_readinto(self):
+        with GzipFile.open(self.filepath) as gzip:
+            stream = gzip.open_stream()
+            stream.seek(36990)
+
+            buf = bytearray(20)
+            self.assertEqual(stream.readinto(buf), 20)
+            self.assertEqual(bytes(buf), self.data[36990:37010])
+
+    def test_buffered(self):
+        with GzipFile.open(self.filepath) as gzip:
+            members = [gzip.getinfo('lines')]
+            reader = io.BufferedReader(gzip.open_stream(members))
+            self.assertEqual(list(reader), [b'line1\n', b'line2\n'])
+
+if __name__ == '__main__':
+    unittest.main()